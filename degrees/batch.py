@@ -0,0 +1,121 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import sys
+import time
+
+import degrees
+
+
+def answer(line):
+    """
+    Answers one JSON query line of the form
+    {"source": person, "target": person[, "mode": mode]}
+    and returns the result record with the query latency.
+
+    A person is an IMDb id, or a name resolved to whoever has the
+    most movies.
+    """
+    start = time.perf_counter()
+    try:
+        query = json.loads(line)
+        source = resolve(query["source"])
+        target = resolve(query["target"])
+        record = {"source": source, "target": target}
+        if "mode" in query:
+            path = degrees.shortest_path(source, target, mode=query["mode"])
+        else:
+            path = degrees.cached_path(source, target)
+        record["degrees"] = None if path is None else len(path)
+        record["path"] = path
+    except (ValueError, KeyError, TypeError) as error:
+        record = {"query": line.strip(), "error": repr(error)}
+    record["ms"] = (time.perf_counter() - start) * 1000
+    return record
+
+
+def resolve(person):
+    """
+    Returns the IMDb id for an id or a name.
+    """
+    if person in degrees.graph.person_index:
+        return person
+    person_id = degrees.person_id_for_name(person, policy="most_movies")
+    if person_id is None:
+        raise KeyError(person)
+    return person_id
+
+
+def run(lines, directory, workers=1, out=sys.stdout, chunksize=16):
+    """
+    Streams one JSON result line to `out` per query line, and returns
+    the list of per-query latencies in milliseconds.
+    """
+    lines = (line for line in lines if line.strip())
+    latencies = []
+    if workers == 1:
+        results = map(answer, lines)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(
+            workers, initializer=degrees.init_worker, initargs=(directory,)
+        )
+        results = pool.imap(answer, lines, chunksize)
+    try:
+        for record in results:
+            latencies.append(record["ms"])
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return latencies
+
+
+def report(latencies, elapsed, out=sys.stderr):
+    """
+    Prints throughput and latency percentiles for a batch.
+    """
+    if not latencies:
+        print("No queries.", file=out)
+        return
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    print(f"{len(ordered)} queries in {elapsed:.3f}s "
+          f"({len(ordered) / elapsed:.1f} queries/s)", file=out)
+    print(f"latency ms: p50 {percentile(50):.3f}  p95 {percentile(95):.3f}  "
+          f"p99 {percentile(99):.3f}  max {ordered[-1]:.3f}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees-of-separation queries in bulk."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("queries", nargs="?", default="-",
+                        help="JSON lines file of queries, or - for stdin")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    # Keep stdout for results only
+    with contextlib.redirect_stdout(sys.stderr):
+        print("Loading data...")
+        degrees.load_data(args.directory)
+        print("Data loaded.")
+
+    start = time.perf_counter()
+    if args.queries == "-":
+        latencies = run(sys.stdin, args.directory, args.workers)
+    else:
+        with open(args.queries, encoding="utf-8") as f:
+            latencies = run(f, args.directory, args.workers)
+    report(latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
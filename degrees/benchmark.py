@@ -0,0 +1,232 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+
+import degrees
+import synthetic
+from util import Node, QueueFrontier
+
+
+class ListQueueFrontier():
+    """
+    The original list-backed queue frontier, kept as a baseline.
+    """
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def compare_modes(pairs):
+    """
+    Runs every search mode over the same (source, target) pairs and
+    prints total wall time and people expanded for each.
+    """
+    lengths = {}
+    for mode in ("bfs", "bidirectional", "astar"):
+        expanded = 0
+        stats = {}
+        start = time.perf_counter()
+        for source, target in pairs:
+            path = degrees.shortest_path(source, target, mode=mode, stats=stats)
+            expanded += stats["expanded"]
+            lengths.setdefault((source, target), set()).add(
+                None if path is None else len(path)
+            )
+        elapsed = time.perf_counter() - start
+        print(f"{mode:>14}: {elapsed:8.3f}s  {expanded:>12} expanded")
+
+    mismatches = [pair for pair, found in lengths.items() if len(found) > 1]
+    if mismatches:
+        sys.exit(f"Path lengths differ for {len(mismatches)} pairs")
+
+
+def compare_frontiers(sizes=(1000, 2000, 4000, 8000)):
+    """
+    Times a fill, membership probe and drain of each frontier at growing
+    sizes; the list baseline grows quadratically, the deque linearly.
+    """
+    for size in sizes:
+        timings = []
+        for frontier_class in (ListQueueFrontier, QueueFrontier):
+            frontier = frontier_class()
+            start = time.perf_counter()
+            for state in range(size):
+                frontier.add(Node(state=state, parent=None, action=None))
+                frontier.contains_state(-state)
+            while not frontier.empty():
+                frontier.remove()
+            timings.append(time.perf_counter() - start)
+        print(f"{size:>8} nodes: list {timings[0]:8.4f}s  deque {timings[1]:8.4f}s")
+
+
+def random_pairs(count, seed=0):
+    """
+    Returns reproducible random (source, target) person id pairs.
+    """
+    rng = random.Random(seed)
+    ids = degrees.graph.person_ids
+    return [(rng.choice(ids), rng.choice(ids)) for _ in range(count)]
+
+
+def run_suite(people, queries, modes=("bidirectional", "astar"), seed=0):
+    """
+    Generates a synthetic dataset of `people` people and returns load
+    times, peak RSS, latency percentiles and people expanded for it.
+    """
+    results = {"people": people, "queries": queries}
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        synthetic.generate(directory, people, seed=seed)
+        results["generate_s"] = time.perf_counter() - start
+
+        # The first load parses the CSV files and writes the snapshot,
+        # the second maps it; each runs in a fresh process so that its
+        # peak RSS is its own
+        for name in ("csv", "snapshot"):
+            seconds, peak = measure_load(directory)
+            results[f"load_{name}_s"] = seconds
+            results[f"load_{name}_peak_rss_mb"] = peak
+        with contextlib.redirect_stdout(io.StringIO()):
+            degrees.load_data(directory)
+
+        start = time.perf_counter()
+        degrees.build_landmarks()
+        results["landmarks_s"] = time.perf_counter() - start
+
+        pairs = random_pairs(queries, seed)
+        latencies = []
+        for source, _ in pairs:
+            start = time.perf_counter()
+            degrees.neighbors_for_person(source)
+            latencies.append(time.perf_counter() - start)
+        results.update(percentiles("neighbors", latencies))
+
+        for mode in modes:
+            latencies = []
+            expanded = 0
+            stats = {}
+            for source, target in pairs:
+                start = time.perf_counter()
+                degrees.shortest_path(source, target, mode=mode, stats=stats)
+                latencies.append(time.perf_counter() - start)
+                expanded += stats["expanded"]
+            results.update(percentiles(mode, latencies))
+            results[f"{mode}_expanded"] = expanded / len(pairs)
+        results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def measure_load(directory):
+    """
+    Loads the dataset in a new process and returns the seconds it took
+    and that process's peak RSS in megabytes.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_timed_load, (directory,))
+
+
+def _timed_load(directory):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        degrees.load_data(directory)
+    return time.perf_counter() - start, peak_rss_mb()
+
+
+def percentiles(name, latencies):
+    """
+    Returns p50/p95/p99 of latencies in seconds, as milliseconds.
+    """
+    ordered = sorted(latencies)
+    return {
+        f"{name}_p{p}_ms": ordered[min(len(ordered) - 1, p * len(ordered) // 100)] * 1000
+        for p in (50, 95, 99)
+    }
+
+
+def peak_rss_mb():
+    """
+    Returns this process's peak resident set size in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Returns the measurements more than `tolerance` (a fraction) worse
+    than the baseline's; every measurement is lower-is-better.
+    """
+    worse = []
+    for key, value in results.items():
+        if key in ("people", "queries") or key not in baseline:
+            continue
+        if value > baseline[key] * (1 + tolerance) and value - baseline[key] > 1e-3:
+            worse.append(f"{key}: {baseline[key]:.4f} -> {value:.4f}")
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="compare search modes")
+    search.add_argument("directory", nargs="?", default="large")
+    search.add_argument("--queries", type=int, default=100)
+
+    commands.add_parser("frontier", help="compare frontier implementations")
+
+    suite = commands.add_parser("suite", help="benchmark a synthetic dataset")
+    suite.add_argument("--people", type=int, default=10000)
+    suite.add_argument("--queries", type=int, default=200)
+    suite.add_argument("--modes", nargs="+", default=["bidirectional", "astar"])
+    suite.add_argument("--save", help="write the results as JSON")
+    suite.add_argument("--baseline", help="fail on regressions against JSON")
+    suite.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.command == "frontier":
+        compare_frontiers()
+    elif args.command == "search":
+        degrees.load_data(args.directory)
+        start = time.perf_counter()
+        degrees.build_landmarks()
+        print(f"landmarks: {time.perf_counter() - start:.3f}s")
+        compare_modes(random_pairs(args.queries))
+    else:
+        results = run_suite(args.people, args.queries, args.modes)
+        for key, value in results.items():
+            print(f"{key:>28}: {value:.4f}" if isinstance(value, float)
+                  else f"{key:>28}: {value}")
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(results, f, indent=4)
+        if args.baseline:
+            with open(args.baseline) as f:
+                worse = regressions(results, json.load(f), args.tolerance)
+            if worse:
+                sys.exit("Regressions:\n" + "\n".join(worse))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Correctness checks for degrees searches, landmarks and updates
+
+Builds a synthetic dataset and compares every search mode, the landmark
+distances and bounds, and the cached paths against a plain BFS, before
+and after incremental updates. Exits with a message on the first
+failure.
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import random
+import sys
+import tempfile
+from collections import deque
+
+import degrees
+import synthetic
+from landmarks import bfs_distances
+
+MODES = ("bfs", "bidirectional", "astar")
+
+
+def distances_from(source):
+    """
+    Returns {person index: distance} for everyone reachable from source.
+    """
+    graph = degrees.graph
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        person = queue.popleft()
+        for _, other in graph.neighbors(person):
+            if other not in distances:
+                distances[other] = distances[person] + 1
+                queue.append(other)
+    return distances
+
+
+def valid_path(source, target, path):
+    """
+    Checks that each step of a path is a movie both people starred in.
+    """
+    graph = degrees.graph
+    current = graph.person_index[source]
+    for movie_id, person_id in path:
+        movie = graph.movie_index[movie_id]
+        person = graph.person_index[person_id]
+        if movie not in graph.movies_of(current) or movie not in graph.movies_of(person):
+            return False
+        current = person
+    return current == graph.person_index[target]
+
+
+def check_pair(source, target):
+    """
+    Checks every search mode, the cached path and the landmark bounds
+    for one pair of person ids.
+    """
+    graph = degrees.graph
+    expected = distances_from(graph.person_index[source]).get(graph.person_index[target])
+    answers = {mode: degrees.shortest_path(source, target, mode=mode) for mode in MODES}
+    answers["cached"] = degrees.cached_path(source, target)
+    for name, path in answers.items():
+        length = None if path is None else len(path)
+        if length != expected or (path is not None and not valid_path(source, target, path)):
+            sys.exit(f"{name}: {source} -> {target} gave {path}, expected length {expected}")
+
+    lower, upper = degrees.distance_bounds(source, target)
+    if expected is None:
+        if upper != math.inf:
+            sys.exit(f"bounds: {source} -> {target} are disconnected, upper is {upper}")
+    elif not lower <= expected <= upper:
+        sys.exit(f"bounds: {source} -> {target} is {expected}, not in [{lower}, {upper}]")
+
+
+def check_landmarks():
+    """
+    Checks every landmark's repaired distances against a fresh BFS.
+    """
+    graph = degrees.graph
+    oracle = degrees.landmarks
+    for landmark, distances in zip(oracle.landmarks, oracle.distances):
+        if len(distances) != len(graph.person_ids):
+            sys.exit(f"landmarks: {len(distances)} distances for {len(graph.person_ids)} people")
+        fresh = bfs_distances(graph, landmark)
+        for person in range(len(graph.person_ids)):
+            if _distance(distances, person) != _distance(fresh, person):
+                sys.exit(f"landmarks: wrong distance from {landmark} to {person}")
+
+
+def _distance(distances, person):
+    unreached = 0xFF if distances.typecode == "B" else 0xFFFF
+    return None if distances[person] == unreached else distances[person]
+
+
+def random_updates(rng, round, count):
+    """
+    Returns people, movies and stars rows that add `count` people, some
+    of them without any movie, and link them and older people through
+    new and existing movies.
+    """
+    graph = degrees.graph
+    people = [{"id": f"new{round}_{k}", "name": f"New Person {round} {k}", "birth": ""}
+              for k in range(count)]
+    movies = [{"id": f"newmovie{round}_{k}", "title": f"New Movie {round} {k}", "year": "2025"}
+              for k in range(count // 2)]
+    movie_ids = [row["id"] for row in movies] + [
+        graph.movie_ids[rng.randrange(len(graph.movie_ids))] for _ in range(count)
+    ]
+    person_ids = [row["id"] for row in people[:count // 2]] + [
+        graph.person_ids[rng.randrange(len(graph.person_ids))] for _ in range(count)
+    ]
+    stars = [{"person_id": rng.choice(person_ids), "movie_id": rng.choice(movie_ids)}
+             for _ in range(3 * count)]
+    return people, movies, stars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check degrees against plain BFS.")
+    parser.add_argument("--people", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        synthetic.generate(directory, args.people, seed=args.seed)
+
+        # Parse the CSV files and write the snapshot, then map it
+        with contextlib.redirect_stdout(io.StringIO()):
+            degrees.load_data(directory)
+            degrees.load_data(directory)
+        degrees.build_landmarks(8)
+
+        def random_pairs():
+            ids = degrees.graph.person_ids
+            return [(ids[rng.randrange(len(ids))], ids[rng.randrange(len(ids))])
+                    for _ in range(args.queries)]
+
+        pairs = random_pairs()
+        for source, target in pairs:
+            check_pair(source, target)
+        print(f"searches agree on {len(pairs)} pairs")
+
+        for round in range(args.rounds):
+            people, movies, stars = random_updates(rng, round, 20)
+            new_pairs = [(row["id"], rng.choice(pairs)[1]) for row in people]
+
+            # New people arrive before any of their movies, then the
+            # rows linking them; earlier pairs exercise cache invalidation
+            degrees.apply_updates(people=people)
+            check_landmarks()
+            for source, target in new_pairs:
+                check_pair(source, target)
+            degrees.apply_updates(movies=movies, stars=stars)
+            check_landmarks()
+            for source, target in pairs + new_pairs + random_pairs():
+                check_pair(source, target)
+            print(f"update {round + 1}: landmarks and searches agree")
+
+
+if __name__ == "__main__":
+    main()
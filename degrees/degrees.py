@@ -1,55 +1,63 @@
+import contextlib
 import csv
+import heapq
+import io
+import math
+import multiprocessing
+import os
 import sys
 import time
+import snapshot
+from array import array
+from collections import OrderedDict
+from graph import Graph
+from landmarks import LandmarkOracle
 from util import Node, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
-names = {}
+# Co-star graph over dense integer ids, filled by load_data
+graph = None
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# Optional landmark distance oracle, built by build_landmarks
+landmarks = None
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+# (source index, target index) -> index path or None, least recently
+# used first, see cached_path
+path_cache = OrderedDict()
+PATH_CACHE_SIZE = 100000
 
+# Directory the graph was loaded from, and the size and modification
+# time of each of its CSV files when they were last read
+data_directory = None
+stamps = None
 
-def load_data(directory):
+# Snapshot file written next to the CSV files
+SNAPSHOT = "graph.snapshot"
+
+
+def load_data(directory, use_snapshot=True):
     """
     Load data from CSV files into memory.
+
+    The parsed graph is cached in a binary snapshot next to the CSV
+    files; while their sizes and modification times are unchanged,
+    later calls memory-map the snapshot instead of parsing again.
     """
-    # Load people
+    global graph, landmarks, data_directory, stamps
     print(directory)
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    path = os.path.join(directory, SNAPSHOT)
+    sources = snapshot.stamp(directory)
+    data_directory = directory
+    stamps = sources
+    landmarks = None
+    path_cache.clear()
+
+    graph = snapshot.load(path, sources) if use_snapshot else None
+    if graph is None:
+        graph = Graph.from_csv(directory)
+        if use_snapshot:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
+                snapshot.save(graph, path, sources)
+            except OSError:
                 pass
 
 
@@ -79,54 +87,402 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person_names[graph.person_index[path[i][1]]]
+            person2 = graph.person_names[graph.person_index[path[i + 1][1]]]
+            movie = graph.movie_titles[graph.movie_index[path[i + 1][0]]]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
-    #le chemin le plus court réseau entre diff acteur
-    discov = set()
+def shortest_path(source, target, mode="bfs", stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target.
+
+    If no possible path, returns None.
+
+    `mode` is "bfs" for a breadth-first search from the source,
+    "bidirectional" to grow breadth-first trees from both ends, or
+    "astar" for an A* search guided by the landmark bounds when
+    build_landmarks has been called.
+    If `stats` is a dict, the number of expanded people is stored
+    under "expanded".
+    """
+    start = graph.person_index[source]
+    goal = graph.person_index[target]
+    if stats is None:
+        stats = {}
+    stats["expanded"] = 0
+    if start == goal:
+        return []
+
+    if mode == "bfs":
+        path = _breadth_first(start, goal, stats)
+    elif mode == "bidirectional":
+        path = _bidirectional(start, goal, stats)
+    elif mode == "astar":
+        path = _astar(start, goal, stats)
+    else:
+        raise ValueError(f"unknown search mode {mode!r}")
+    return None if path is None else graph.path_ids(path)
+
+
+def _breadth_first(start, goal, stats):
+    """
+    One-sided breadth-first search from start to goal.
+    """
+    explored = set()
     front = QueueFrontier()
-    front.add(Node(state=source, parent=None, action=None))
-    verif = True
-    while verif:
-        if front.empty():
-            raise Exception("Pas de solution amigo")
-        nito = front.remove()
-        if nito.state == target:
-            path = []
-            while nito.parent  != None:
-                path.append((nito.action, nito.state))
-                nito = nito.parent
-            path.reverse()
-            return path
-        discov.add((nito.action, nito.state))
-        for action, state in neighbors_for_person(nito.state):
-            if (action, state) not in discov and not front.contains_state(state) :
-                front.add(Node(state=state, parent=nito, action=action))
-    
+    front.add(Node(state=start, parent=None, action=None))
+    while not front.empty():
+        node = front.remove()
+        explored.add(node.state)
+        stats["expanded"] += 1
+        for movie, person in graph.neighbors(node.state):
+            if person in explored or front.contains_state(person):
+                continue
+            child = Node(state=person, parent=node, action=movie)
+            if person == goal:
+                return _unwind(child)
+            front.add(child)
+    return None
+
+
+def _bidirectional(start, goal, stats):
+    """
+    Breadth-first search from both ends, always expanding a whole
+    level of the smaller frontier, until the two trees touch.
+    """
+    # Person -> (movie, person one step closer to that side's root)
+    parents = ({start: None}, {goal: None})
+    depths = ({start: 0}, {goal: 0})
+    frontiers = ([start], [goal])
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        seen, other = parents[side], parents[1 - side]
+        depth, other_depth = depths[side], depths[1 - side]
+
+        # Finish the level so the shortest meeting point is chosen
+        best = None
+        level = []
+        for person in frontiers[side]:
+            stats["expanded"] += 1
+            for movie, neighbor in graph.neighbors(person):
+                if neighbor in seen:
+                    continue
+                seen[neighbor] = (movie, person)
+                depth[neighbor] = depth[person] + 1
+                level.append(neighbor)
+                if neighbor in other:
+                    length = depth[neighbor] + other_depth[neighbor]
+                    if best is None or length < best[0]:
+                        best = (length, neighbor)
+        if best is not None:
+            return _stitch(parents, best[1])
+        frontiers = (level, frontiers[1]) if side == 0 else (frontiers[0], level)
+    return None
+
+
+def _astar(start, goal, stats):
+    """
+    A* search using the landmark lower bounds as the heuristic.
+    """
+    if landmarks is None:
+        estimate = lambda person: 0
+    else:
+        estimate = landmarks.heuristic(goal)
+    if estimate(start) == math.inf:
+        return None
 
+    parents = {start: None}
+    costs = {start: 0}
+    closed = set()
 
+    # Ties on f prefer the deeper person, who is closer to the goal
+    heap = [(estimate(start), 0, start)]
+    while heap:
+        _, depth, person = heapq.heappop(heap)
+        if person == goal:
+            return _stitch((parents, {goal: None}), goal)
+        if person in closed:
+            continue
+        closed.add(person)
+        stats["expanded"] += 1
+        cost = -depth + 1
+        for movie, neighbor in graph.neighbors(person):
+            if cost >= costs.get(neighbor, math.inf):
+                continue
+            remaining = estimate(neighbor)
+            if remaining == math.inf:
+                continue
+            costs[neighbor] = cost
+            parents[neighbor] = (movie, person)
+            heapq.heappush(heap, (cost + remaining, -cost, neighbor))
+    return None
 
 
+def _stitch(parents, meet):
+    """
+    Joins the forward and backward trees at the meeting person.
+    """
+    forward, backward = parents
+    path = []
+    person = meet
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+    person = meet
+    while backward[person] is not None:
+        movie, person = backward[person]
+        path.append((movie, person))
+    return path
+
 
+def shortest_paths(source, targets):
+    """
+    Returns a dict mapping each target person id to the shortest list
+    of (movie_id, person_id) pairs from source, or None if unconnected.
 
-def person_id_for_name(name):
+    A single breadth-first search records one parent per person and
+    stops as soon as every target has been reached.
+    """
+    start = graph.person_index[source]
+    goals = {graph.person_index[target] for target in targets}
+    count = len(graph.person_ids)
+    parent_person = array("i", [-1]) * count
+    parent_movie = array("i", [-1]) * count
+    scanned = bytearray(len(graph.movie_ids))
+
+    parent_person[start] = start
+    remaining = goals - {start}
+    level = [start]
+    while level and remaining:
+        following = []
+        for person in level:
+            for movie in graph.movies_of(person):
+
+                # Every star of a cast is first reached at the same depth
+                if scanned[movie]:
+                    continue
+                scanned[movie] = 1
+                for other in graph.stars_of(movie):
+                    if parent_person[other] == -1:
+                        parent_person[other] = person
+                        parent_movie[other] = movie
+                        following.append(other)
+                        remaining.discard(other)
+        level = following
+
+    paths = {}
+    for target in targets:
+        person = graph.person_index[target]
+        if parent_person[person] == -1:
+            paths[target] = None
+            continue
+        path = []
+        while person != start:
+            path.append((parent_movie[person], person))
+            person = parent_person[person]
+        path.reverse()
+        paths[target] = graph.path_ids(path)
+    return paths
+
+
+def shortest_paths_many(sources, targets, workers=None):
+    """
+    Returns {source: shortest_paths(source, targets)} for many sources,
+    splitting them across a process pool of `workers` processes.
+    """
+    sources = list(sources)
+    targets = list(targets)
+    if workers == 1:
+        return {source: shortest_paths(source, targets) for source in sources}
+    with multiprocessing.Pool(
+        workers, initializer=init_worker, initargs=(data_directory,)
+    ) as pool:
+        results = pool.starmap(
+            shortest_paths, [(source, targets) for source in sources]
+        )
+    return dict(zip(sources, results))
+
+
+def init_worker(directory):
+    """
+    Loads the graph in a pool worker that did not inherit it by
+    forking; the snapshot is memory-mapped, so its pages are shared.
+    """
+    if graph is None:
+        with contextlib.redirect_stdout(sys.stderr):
+            load_data(directory)
+
+
+def cached_path(source, target):
+    """
+    Returns shortest_path(source, target), remembering the answer
+    until an update to the graph could change it. Only the
+    PATH_CACHE_SIZE most recently used answers are kept.
+    """
+    key = (graph.person_index[source], graph.person_index[target])
+    if key in path_cache:
+        path_cache.move_to_end(key)
+        return path_cache[key]
+    path = shortest_path(source, target, mode="bidirectional")
+    path_cache[key] = path
+    if len(path_cache) > PATH_CACHE_SIZE:
+        path_cache.popitem(last=False)
+    return path
+
+
+def apply_updates(people=(), movies=(), stars=()):
+    """
+    Adds people, movies and stars rows, shaped like the rows of the
+    CSV files, to the loaded graph without reloading it.
+
+    Landmark distances are repaired where the new edges shorten them,
+    and a cached path is dropped only if it could now be shorter: every
+    new path runs through a person who gained a movie, so a cached
+    path of length L survives when the landmark lower bounds through
+    each such person are at least L.
+    """
+    for row in people:
+        if row["id"] not in graph.person_index:
+            graph.add_person(row["id"], row["name"], row["birth"])
+    for row in movies:
+        if row["id"] not in graph.movie_index:
+            graph.add_movie(row["id"], row["title"], row["year"])
+
+    hubs = set()
+    edges = []
+    for row in stars:
+        person = graph.person_index.get(row["person_id"])
+        movie = graph.movie_index.get(row["movie_id"])
+        if person is None or movie is None:
+            continue
+        cast = graph.add_star(person, movie)
+        if cast is not None:
+            hubs.add(person)
+            edges.extend((person, other) for other in cast)
+
+    # Also grows the distance arrays for people added without any edges
+    if landmarks is not None:
+        landmarks.add_edges(edges)
+    if not hubs:
+        return
+
+    for key, path in list(path_cache.items()):
+        if _may_shorten(key, path, hubs):
+            del path_cache[key]
+
+
+def _may_shorten(key, path, hubs):
+    """
+    Checks whether a cached path could have been shortened by new
+    edges, all of which touch one of the hub people.
+    """
+    if path is None:
+        return True
+    if len(path) <= 1:
+        return False
+    if landmarks is None:
+        return True
+    source, target = key
+    for hub in hubs:
+        to_hub, _ = landmarks.bounds(source, hub)
+        from_hub, _ = landmarks.bounds(hub, target)
+        if to_hub + from_hub < len(path):
+            return True
+    return False
+
+
+def refresh_data(directory):
+    """
+    Applies the rows appended to the CSV files since they were loaded
+    or last refreshed.
+    """
+    global stamps
+    current = snapshot.stamp(directory)
+    rows = {}
+    for name in snapshot.SOURCES:
+        size = stamps[name][0]
+        if current[name][0] < size:
+            raise ValueError(f"{name} shrank; reload it with load_data")
+        rows[name] = _appended_rows(os.path.join(directory, name), size)
+    apply_updates(rows["people.csv"], rows["movies.csv"], rows["stars.csv"])
+    stamps = current
+
+
+def _appended_rows(path, offset):
+    """
+    Returns the CSV rows past a byte offset, keyed by the file's header.
+    """
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        f.seek(max(offset, f.tell()))
+        text = f.read().decode("utf-8")
+    return list(csv.DictReader(io.StringIO(text), fieldnames=header))
+
+
+def build_landmarks(count=16):
+    """
+    Precomputes BFS distances from the `count` people with the most
+    movies, enabling distance_bounds and the "astar" search mode.
+    """
+    global landmarks
+    landmarks = LandmarkOracle(graph, count)
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person ids, without searching. Upper is math.inf when unknown;
+    both are math.inf when the two people are not connected.
+    """
+    if landmarks is None:
+        raise RuntimeError("build_landmarks must be called first")
+    return landmarks.bounds(graph.person_index[source], graph.person_index[target])
+
+
+def _unwind(node):
+    """
+    Returns the (movie, person) index pairs leading to a node.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def person_id_for_name(name, policy="ask"):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    `policy` decides between people sharing the name: "ask" prompts
+    for an id, "most_movies" and "earliest_birth" pick one without
+    prompting, and "none" gives up.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    people = graph.names.get(name.lower(), [])
+    person_ids = [graph.person_ids[i] for i in people]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if policy == "most_movies":
+            return graph.person_ids[max(people, key=graph.degree)]
+        elif policy == "earliest_birth":
+            return graph.person_ids[min(people, key=_birth_order)]
+        elif policy == "none":
+            return None
+        elif policy != "ask":
+            raise ValueError(f"unknown disambiguation policy {policy!r}")
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            person = graph.person_index[person_id]
+            name = graph.person_names[person]
+            birth = graph.person_births[person]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -139,17 +495,39 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def _birth_order(person):
+    """
+    Sort key putting earlier births first and unknown births last.
+    """
+    birth = graph.person_births[person]
+    return (0, int(birth)) if birth.isdigit() else (1, 0)
+
+
+def search_names(query, prefix=False, max_distance=0, limit=10):
+    """
+    Returns up to `limit` (name, person_id) matches for a query:
+    exact by default, every name starting with the query if `prefix`,
+    or every name within `max_distance` edits, closest first.
+    """
+    if prefix:
+        matches = graph.names.prefix(query, limit)
+    elif max_distance:
+        matches = [(key, people) for _, key, people
+                   in graph.names.fuzzy(query, max_distance, limit)]
+    else:
+        matches = [(query.lower(), graph.names.get(query.lower(), []))]
+    found = [(graph.person_names[person], graph.person_ids[person])
+             for _, people in matches for person in people]
+    return found[:limit]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    person = graph.person_index[person_id]
+    return set(graph.path_ids(graph.neighbors(person)))
 
 
 if __name__ == "__main__":
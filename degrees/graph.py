@@ -0,0 +1,214 @@
+import csv
+from array import array
+
+from nameindex import NameIndex
+
+
+class Graph():
+    """
+    Compact co-star graph.
+
+    People and movies are numbered densely from 0, and the person->movie
+    and movie->person edges are stored as CSR buffers: for a person p,
+    its movies are person_movies[person_offsets[p]:person_offsets[p + 1]],
+    and likewise for the stars of a movie.
+    """
+
+    def __init__(self):
+
+        # Dense index -> IMDb id, name/title and birth/year
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # IMDb id -> dense index
+        self.person_index = {}
+        self.movie_index = {}
+
+        # Lowercase name -> person indices
+        self.names = NameIndex()
+
+        # CSR adjacency buffers
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_people = array("i")
+
+        # Edges added since the CSR buffers were built
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+        # Memory map backing the buffers when loaded from a snapshot
+        self.mapping = None
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a graph from the people, movies and stars CSV files.
+        """
+        graph = cls()
+
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                graph.add_person(row["id"], row["name"], row["birth"])
+
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                graph.add_movie(row["id"], row["title"], row["year"])
+
+        # Encode each (person, movie) edge as one integer so duplicate
+        # rows collapse and the sorted order groups edges by person
+        width = len(graph.movie_ids)
+        edges = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = graph.person_index.get(row["person_id"])
+                movie = graph.movie_index.get(row["movie_id"])
+                if person is not None and movie is not None:
+                    edges.add(person * width + movie)
+
+        graph.set_edges(sorted(edges), width)
+        graph.names.compact()
+        return graph
+
+    def add_person(self, person_id, name, birth):
+        """
+        Register a person and return their dense index.
+        """
+        index = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.person_index[person_id] = index
+        self.names.add(name, index)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Register a movie and return its dense index.
+        """
+        index = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        self.movie_index[movie_id] = index
+        return index
+
+    def set_edges(self, edges, width):
+        """
+        Fill both CSR directions from sorted `person * width + movie` codes.
+        """
+        num_people = len(self.person_ids)
+        num_movies = len(self.movie_ids)
+
+        # Person -> movies: the codes are already grouped by person
+        person_degree = array("i", bytes(4 * num_people))
+        movie_degree = array("i", bytes(4 * num_movies))
+        self.person_movies = array("i", bytes(4 * len(edges)))
+        for k, code in enumerate(edges):
+            person, movie = divmod(code, width)
+            self.person_movies[k] = movie
+            person_degree[person] += 1
+            movie_degree[movie] += 1
+        self.person_offsets = _prefix_sums(person_degree)
+
+        # Movie -> people: counting sort on the movie index
+        self.movie_offsets = _prefix_sums(movie_degree)
+        cursor = array("i", self.movie_offsets[:-1])
+        self.movie_people = array("i", bytes(4 * len(edges)))
+        for code in edges:
+            person, movie = divmod(code, width)
+            self.movie_people[cursor[movie]] = person
+            cursor[movie] += 1
+
+    def add_star(self, person, movie):
+        """
+        Adds a person to a movie's cast after the CSR buffers were built.
+        Returns the people already in the cast, or None if the person
+        already was.
+        """
+        cast = self.stars_of(movie)
+        if person in cast:
+            return None
+        cast = list(cast)
+        self.extra_movies.setdefault(person, []).append(movie)
+        self.extra_stars.setdefault(movie, []).append(person)
+        return cast
+
+    def compact(self):
+        """
+        Folds added edges into the CSR buffers.
+        """
+        if not self.extra_movies:
+            return
+        width = len(self.movie_ids)
+        edges = [person * width + movie
+                 for person in range(len(self.person_ids))
+                 for movie in sorted(self.movies_of(person))]
+        self.extra_movies = {}
+        self.extra_stars = {}
+        self.set_edges(edges, width)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person starred in.
+        """
+        offsets = self.person_offsets
+        movies = (self.person_movies[offsets[person]:offsets[person + 1]]
+                  if person + 1 < len(offsets) else ())
+        extra = self.extra_movies.get(person)
+        return movies if extra is None else [*movies, *extra]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices starring in a movie.
+        """
+        offsets = self.movie_offsets
+        people = (self.movie_people[offsets[movie]:offsets[movie + 1]]
+                  if movie + 1 < len(offsets) else ())
+        extra = self.extra_stars.get(movie)
+        return people if extra is None else [*people, *extra]
+
+    def degree(self, person):
+        """
+        Returns the number of movies a person starred in.
+        """
+        return len(self.movies_of(person))
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for everyone who starred
+        in a movie with the given person, the person included.
+        """
+        if self.extra_stars:
+            for movie in self.movies_of(person):
+                for other in self.stars_of(movie):
+                    yield movie, other
+            return
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for movie in self.movies_of(person):
+            for other in movie_people[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                yield movie, other
+
+    def path_ids(self, path):
+        """
+        Converts a list of (movie, person) indices to IMDb ids.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+def _prefix_sums(counts):
+    """
+    Returns the CSR offsets array for a list of per-row counts.
+    """
+    offsets = array("i", bytes(4 * (len(counts) + 1)))
+    total = 0
+    for i, count in enumerate(counts):
+        total += count
+        offsets[i + 1] = total
+    return offsets
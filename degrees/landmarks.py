@@ -0,0 +1,145 @@
+import heapq
+import math
+from array import array
+
+
+class LandmarkOracle():
+    """
+    Degree-of-separation bounds from precomputed landmark distances.
+
+    For every landmark L, the triangle inequality gives
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t).
+    """
+
+    def __init__(self, graph, count=16, landmarks=None):
+        self.graph = graph
+        if landmarks is None:
+            landmarks = sorted(
+                range(len(graph.person_ids)), key=graph.degree, reverse=True
+            )[:count]
+        self.landmarks = list(landmarks)
+
+        # One distance array per landmark; `unreached` marks other components
+        self.distances = [bfs_distances(graph, landmark)
+                          for landmark in self.landmarks]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between two person
+        indices. Upper is math.inf when no landmark reaches both; both
+        are math.inf when the two are known to be disconnected.
+        """
+        if source == target:
+            return 0, 0
+        lower, upper = 0, math.inf
+        for distances in self.distances:
+            unreached = _unreached(distances)
+            d_source, d_target = distances[source], distances[target]
+            if d_source == unreached and d_target == unreached:
+                continue
+            if d_source == unreached or d_target == unreached:
+                return math.inf, math.inf
+            lower = max(lower, abs(d_source - d_target))
+            upper = min(upper, d_source + d_target)
+        return lower, upper
+
+    def add_edges(self, edges):
+        """
+        Repairs the landmark distances after (person, person) edges were
+        added to the graph, and returns how many distances changed.
+
+        Added edges can only shorten distances, so only people whose
+        distance drops are revisited, in order of their new distance.
+        """
+        changed = 0
+        count = len(self.graph.person_ids)
+        for k, distances in enumerate(self.distances):
+            unreached = _unreached(distances)
+            if len(distances) < count:
+                distances.extend([unreached] * (count - len(distances)))
+
+            # Seed with every endpoint the new edges bring closer
+            heap = []
+            for a, b in edges:
+                for near, far in ((a, b), (b, a)):
+                    if distances[near] == unreached:
+                        continue
+                    if distances[far] == unreached or distances[near] + 1 < distances[far]:
+                        heap.append((distances[near] + 1, far))
+            heapq.heapify(heap)
+
+            while heap:
+                depth, person = heapq.heappop(heap)
+                if depth >= unreached:
+                    distances = array("H", [
+                        0xFFFF if d == unreached else d for d in distances
+                    ])
+                    self.distances[k] = distances
+                    unreached = 0xFFFF
+                current = distances[person]
+                if current != unreached and current <= depth:
+                    continue
+                distances[person] = depth
+                changed += 1
+                for _, other in self.graph.neighbors(person):
+                    d_other = distances[other]
+                    if d_other == unreached or depth + 1 < d_other:
+                        heapq.heappush(heap, (depth + 1, other))
+        return changed
+
+    def heuristic(self, target):
+        """
+        Returns an admissible, consistent estimate of each person's
+        distance to target, as a function of the person index.
+        """
+        columns = [(distances, distances[target], _unreached(distances))
+                   for distances in self.distances]
+
+        def estimate(person):
+            best = 0
+            for distances, d_target, unreached in columns:
+                d_person = distances[person]
+                if (d_person == unreached) != (d_target == unreached):
+                    return math.inf
+                if d_person != unreached:
+                    best = max(best, abs(d_person - d_target))
+            return best
+        return estimate
+
+
+def bfs_distances(graph, source):
+    """
+    Returns an array of distances from source to every person, in
+    bytes when they fit, with the typecode's maximum for unreached.
+    """
+    unreached = 0xFFFF
+    distances = array("H", [unreached]) * len(graph.person_ids)
+    scanned = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    level = [source]
+    depth = 0
+    while level:
+        depth += 1
+        following = []
+        for person in level:
+            for movie in graph.movies_of(person):
+
+                # A cast puts all its stars at the same depth, so it
+                # only needs scanning the first time it is reached
+                if scanned[movie]:
+                    continue
+                scanned[movie] = 1
+                for other in graph.stars_of(movie):
+                    if distances[other] == unreached:
+                        distances[other] = depth
+                        following.append(other)
+        level = following
+
+    reached = [d for d in distances if d != unreached]
+    if max(reached) < 0xFF:
+        return array("B", [0xFF if d == unreached else d for d in distances])
+    return distances
+
+
+def _unreached(distances):
+    return 0xFF if distances.typecode == "B" else 0xFFFF
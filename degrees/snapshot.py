@@ -0,0 +1,215 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from graph import Graph
+from nameindex import NameIndex
+
+MAGIC = b"DEGREES\0"
+VERSION = 1
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Graph attributes stored as CSR integer arrays
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+
+# Graph attributes stored as string tables
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years")
+
+
+class StringTable():
+    """
+    Read-only sequence of strings packed into one UTF-8 blob,
+    with string i spanning blob[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+        # Strings appended after the table was mapped
+        self.extra = []
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.extra)
+
+    def __getitem__(self, i):
+        base = len(self.offsets) - 1
+        if i >= base:
+            return self.extra[i - base]
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def append(self, string):
+        self.extra.append(string)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SortedLookup():
+    """
+    Read-only mapping from the strings of a table to their positions,
+    answered by binary search over a sorted permutation of the table.
+    """
+
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+        # Keys added after the table was mapped
+        self.extra = {}
+
+    def get(self, key, default=None):
+        if key in self.extra:
+            return self.extra[key]
+        order, table = self.order, self.table
+        k = bisect_left(order, key, key=table.__getitem__)
+        if k < len(order) and table[order[k]] == key:
+            return order[k]
+        return default
+
+    def __getitem__(self, key):
+        index = self.get(key)
+        if index is None:
+            raise KeyError(key)
+        return index
+
+    def __setitem__(self, key, index):
+        self.extra[key] = index
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.order) + len(self.extra)
+
+
+def stamp(directory):
+    """
+    Returns the size and modification time of each source CSV file.
+    """
+    stamps = {}
+    for name in SOURCES:
+        info = os.stat(os.path.join(directory, name))
+        stamps[name] = [info.st_size, info.st_mtime_ns]
+    return stamps
+
+
+def save(graph, path, sources):
+    """
+    Writes the graph to a binary snapshot at path, tagged with the
+    source file stamps it was built from.
+    """
+    graph.compact()
+    sections = {}
+    for name in ARRAYS:
+        sections[name] = getattr(graph, name)
+    for name in STRINGS:
+        blob, offsets = _pack_strings(getattr(graph, name))
+        sections[f"{name}.blob"] = blob
+        sections[f"{name}.offsets"] = offsets
+    sections["person_ids.order"] = _sorted_order(graph.person_ids)
+    sections["movie_ids.order"] = _sorted_order(graph.movie_ids)
+
+    graph.names.compact()
+    blob, offsets = _pack_strings(graph.names.keys)
+    sections["names.blob"] = blob
+    sections["names.offsets"] = offsets
+    sections["names.postings"] = array("i", graph.names.people)
+    sections["names.posting_offsets"] = array("q", graph.names.offsets)
+
+    # Lay sections out on 8-byte boundaries after the header
+    layout = {}
+    position = 0
+    for name, data in sections.items():
+        layout[name] = [position, data.typecode, len(data)]
+        position += _aligned(len(data) * data.itemsize)
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": sources,
+        "sections": layout
+    }).encode("utf-8")
+    start = _aligned(len(MAGIC) + 8 + len(header))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+        for name, data in sections.items():
+            f.seek(start + layout[name][0])
+            data.tofile(f)
+        f.truncate(start + position)
+    os.replace(temporary, path)
+
+
+def load(path, sources):
+    """
+    Memory-maps a snapshot and returns its graph, or None if the file
+    is missing, from another version, or built from different sources.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    prefix = len(MAGIC) + 8
+    if mapping[:len(MAGIC)] != MAGIC:
+        return None
+    version, length = struct.unpack("<II", mapping[len(MAGIC):prefix])
+    if version != VERSION:
+        return None
+    header = json.loads(mapping[prefix:prefix + length].decode("utf-8"))
+    if header["byteorder"] != sys.byteorder or header["sources"] != sources:
+        return None
+
+    start = _aligned(prefix + length)
+    view = memoryview(mapping)
+    sections = {}
+    for name, (position, typecode, count) in header["sections"].items():
+        size = count * array(typecode).itemsize
+        sections[name] = view[start + position:start + position + size].cast(typecode)
+
+    graph = Graph()
+    graph.mapping = mapping
+    for name in ARRAYS:
+        setattr(graph, name, sections[name])
+    for name in STRINGS:
+        setattr(graph, name, StringTable(
+            sections[f"{name}.blob"], sections[f"{name}.offsets"]
+        ))
+    graph.person_index = SortedLookup(graph.person_ids, sections["person_ids.order"])
+    graph.movie_index = SortedLookup(graph.movie_ids, sections["movie_ids.order"])
+    graph.names = NameIndex(
+        StringTable(sections["names.blob"], sections["names.offsets"]),
+        sections["names.posting_offsets"],
+        sections["names.postings"]
+    )
+    return graph
+
+
+def _pack_strings(strings):
+    """
+    Returns the UTF-8 blob and offsets array for a list of strings.
+    """
+    blob = array("B")
+    offsets = array("q", [0])
+    for string in strings:
+        blob.frombytes(string.encode("utf-8"))
+        offsets.append(len(blob))
+    return blob, offsets
+
+
+def _sorted_order(strings):
+    """
+    Returns the positions of strings in sorted string order.
+    """
+    return array("i", sorted(range(len(strings)), key=strings.__getitem__))
+
+
+def _aligned(size):
+    return (size + 7) & ~7
@@ -0,0 +1,103 @@
+import argparse
+import csv
+import math
+import os
+import random
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Emma",
+    "Kevin", "Tom", "Sally", "Gary", "Robin", "Demi", "Cary", "Valeria"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson",
+    "Anderson", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Thompson",
+    "Bacon", "Cruise", "Hanks", "Field", "Sinise", "Wright", "Watson"
+]
+
+
+def generate(directory, people, movies=None, seed=0, skew=2.0, max_cast=300):
+    """
+    Writes people.csv, movies.csv and stars.csv with `people` people
+    and `movies` movies (people // 4 by default) to directory.
+
+    Cast sizes follow a Pareto power law, and casting favours a small
+    set of prolific actors, so both the movie and the person degree
+    distributions are heavy-tailed like IMDb's. Rows are streamed, so
+    tens of millions of people fit in constant memory.
+    """
+    rng = random.Random(seed)
+    movies = people // 4 if movies is None else movies
+    os.makedirs(directory, exist_ok=True)
+
+    # Shuffle ids so that popularity is not correlated with file order
+    stride = _coprime_stride(people, rng)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.9:
+                name += f" {_suffix(person)}"
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([person + 1, name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movies):
+            writer.writerow([movie + 1, f"Movie {_suffix(movie).title()}",
+                             rng.randint(1920, 2024)])
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movies):
+            cast = min(max_cast, int(rng.paretovariate(1.3)))
+            for _ in range(cast):
+                rank = int(people * rng.random() ** skew)
+                writer.writerow([rank * stride % people + 1, movie + 1])
+
+
+def _coprime_stride(n, rng):
+    """
+    Returns a stride that visits every residue modulo n exactly once.
+    """
+    while True:
+        stride = rng.randrange(1, max(n, 2))
+        if math.gcd(stride, n) == 1:
+            return stride
+
+
+def _suffix(n):
+    """
+    Returns a short lowercase word that is unique for each n.
+    """
+    letters = []
+    n += 1
+    while n:
+        n, k = divmod(n - 1, 26)
+        letters.append(chr(ord("a") + k))
+    return "".join(reversed(letters))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic IMDb-like degrees dataset."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=10000)
+    parser.add_argument("--movies", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.directory, args.people, args.movies, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import random
+import sys
+import time
+
+from logic import *
+from sat import IncrementalKB
+import puzzle
+
+
+def compare(repeat):
+    """
+    Answers every puzzle.py query with each model checking engine, one
+    query at a time and all at once with model_check_many, and prints
+    the wall time per engine; fails if any answer differs.
+    """
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    knowledge_bases = [puzzle.knowledge0, puzzle.knowledge1,
+                       puzzle.knowledge2, puzzle.knowledge3]
+    answers = {}
+    for engine in ("recursive", "enumerate", "dpll", "vectorized"):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = [model_check(knowledge, symbol, engine=engine)
+                     for knowledge in knowledge_bases for symbol in symbols]
+        elapsed = time.perf_counter() - start
+        answers[engine] = found
+        print(f"{engine:>15}: {elapsed:8.3f}s")
+
+    # All six queries per knowledge base in one model_check_many call
+    for engine in ("enumerate", "dpll"):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = [holds for knowledge in knowledge_bases
+                     for holds in model_check_many(knowledge, symbols, engine=engine)]
+        elapsed = time.perf_counter() - start
+        answers[f"many-{engine}"] = found
+        print(f"{'many-' + engine:>15}: {elapsed:8.3f}s")
+
+    if len({tuple(found) for found in answers.values()}) > 1:
+        sys.exit("Engines disagree")
+
+
+def chain(count, workers=None):
+    """
+    Times the vectorized and parallel engines on a chain of `count`
+    implications p0 => p1 => ..., where proving p0 => p_last needs
+    every model and one extra symbol puts a counter-model in the last
+    shard.
+    """
+    symbols = [Symbol(f"p{i}") for i in range(count)]
+    knowledge = And(*[Implication(symbols[i], symbols[i + 1])
+                      for i in range(count - 1)])
+    for query in (Implication(symbols[0], symbols[-1]),
+                  Implication(symbols[0], Symbol("q"))):
+        for engine in ("vectorized", "parallel"):
+            start = time.perf_counter()
+            if engine == "parallel":
+                entailed = parallel_check(knowledge, query, workers=workers)
+            else:
+                entailed = model_check(knowledge, query, engine=engine)
+            elapsed = time.perf_counter() - start
+            print(f"{engine:>15}: {elapsed:8.3f}s {query.formula()}: {entailed}")
+
+
+def stream(count):
+    """
+    Adds the facts of a shuffled implication chain over `count` symbols,
+    then its first symbol, one at a time, asking after each fact which
+    symbols follow. Times an IncrementalKB against model_check_many
+    with DPLL from scratch and fails if the answers differ.
+    """
+    symbols = [Symbol(f"p{i}") for i in range(count)]
+    facts = [Implication(symbols[i], symbols[i + 1]) for i in range(count - 1)]
+    random.Random(0).shuffle(facts)
+    facts.append(symbols[0])
+
+    start = time.perf_counter()
+    kb = IncrementalKB()
+    incremental = []
+    for fact in facts:
+        kb.add(fact)
+        incremental.append([kb.entails(symbol) for symbol in symbols])
+    print(f"{'incremental':>15}: {time.perf_counter() - start:8.3f}s")
+
+    start = time.perf_counter()
+    scratch = [model_check_many(And(*facts[:k + 1]), symbols, engine="dpll")
+               for k in range(len(facts))]
+    print(f"{'scratch':>15}: {time.perf_counter() - start:8.3f}s")
+
+    if incremental != scratch:
+        sys.exit("Engines disagree")
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "chain":
+        chain(int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) == 4 else None)
+    elif len(sys.argv) == 3 and sys.argv[1] == "stream":
+        stream(int(sys.argv[2]))
+    elif len(sys.argv) <= 2:
+        compare(int(sys.argv[1]) if len(sys.argv) == 2 else 20)
+    else:
+        sys.exit("Usage: python benchmark.py [repeat] | chain symbols [workers]"
+                 " | stream symbols")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Correctness checks for the knights model checking engines
+
+Answers random entailment queries with every engine, and with an
+IncrementalKB fed one fact at a time, and compares the answers against
+the original recursive check_all. Exits with a message on the first
+disagreement.
+"""
+
+import gc
+import pickle
+import random
+import sys
+
+from logic import *
+from sat import IncrementalKB
+
+ENGINES = ["enumerate", "dpll"] + (["vectorized"] if np is not None else [])
+
+
+def random_sentence(rng, names, depth):
+    """
+    Returns a random sentence over symbols named `names`, nested up to
+    `depth` connectives deep.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        return Symbol(rng.choice(names))
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(rng, names, depth - 1))
+    if kind == 1:
+        return And(*[random_sentence(rng, names, depth - 1)
+                     for _ in range(rng.randint(0, 3))])
+    if kind == 2:
+        return Or(*[random_sentence(rng, names, depth - 1)
+                    for _ in range(rng.randint(0, 3))])
+    if kind == 3:
+        return Implication(random_sentence(rng, names, depth - 1),
+                           random_sentence(rng, names, depth - 1))
+    return Biconditional(random_sentence(rng, names, depth - 1),
+                         random_sentence(rng, names, depth - 1))
+
+
+def check_engines(trials, seed=0):
+    """
+    Checks model_check with every engine, and model_check_many, on
+    random knowledge bases and queries.
+    """
+    rng = random.Random(seed)
+    names = [f"s{i}" for i in range(7)]
+    for trial in range(trials):
+        knowledge = And(*[random_sentence(rng, names, 3)
+                          for _ in range(rng.randint(1, 4))])
+        queries = [random_sentence(rng, names, 2) for _ in range(rng.randint(0, 5))]
+        expected = [model_check(knowledge, query, engine="recursive")
+                    for query in queries]
+        for engine in ENGINES:
+            found = [model_check(knowledge, query, engine=engine) for query in queries]
+            if found != expected:
+                sys.exit(f"{engine}: wrong answer for {knowledge.formula()}")
+        for engine in ("enumerate", "dpll"):
+            if model_check_many(knowledge, queries, engine=engine) != expected:
+                sys.exit(f"model_check_many {engine}: wrong answer for {knowledge.formula()}")
+
+        # Process pools are slow to start, so only check a few
+        if trial % 25 == 0:
+            for query, entailed in zip(queries, expected):
+                if parallel_check(knowledge, query, split=2, workers=2) != entailed:
+                    sys.exit(f"parallel: wrong answer for {knowledge.formula()}")
+    print(f"engines agree on {trials} knowledge bases")
+
+
+def check_incremental(trials, seed=0):
+    """
+    Adds random facts to an IncrementalKB one at a time and re-asks
+    a fixed set of queries after each, as the deduction service does.
+    """
+    rng = random.Random(seed)
+    names = [f"s{i}" for i in range(6)]
+    checks = 0
+    for trial in range(trials):
+        knowledge = IncrementalKB()
+        facts = []
+        queries = ([random_sentence(rng, names, 2) for _ in range(4)]
+                   + [Symbol(name) for name in names[:3]]
+                   + [Not(Symbol(name)) for name in names[:3]])
+        for _ in range(rng.randint(1, 8)):
+            fact = random_sentence(rng, names, 3)
+            facts.append(fact)
+            knowledge.add(fact)
+            for query in rng.sample(queries, 6):
+                expected = model_check(And(*facts), query, engine="recursive")
+                if knowledge.entails(query) != expected:
+                    sys.exit(f"IncrementalKB: wrong answer for {query.formula()} "
+                             f"after {len(facts)} facts")
+                checks += 1
+    print(f"IncrementalKB agrees on {checks} queries")
+
+
+def check_deep_nesting():
+    """
+    Checks the compiled engines on sentences nested too deeply to be
+    compiled as one expression.
+    """
+    symbols = [Symbol(f"p{i}") for i in range(4)]
+    knowledge = And(symbols[1], Implication(symbols[1], symbols[2]))
+    for depth in (150, 400):
+        query = symbols[0]
+        for i in range(depth):
+            query = Implication(symbols[i % 4], query)
+        for sentence in (query, Not(query)):
+            expected = model_check(knowledge, sentence, engine="recursive")
+            if (model_check(knowledge, sentence) != expected
+                    or model_check_many(knowledge, [sentence]) != [expected]):
+                sys.exit(f"enumerate: wrong answer at nesting depth {depth}")
+    print("deeply nested sentences agree")
+
+
+def check_interning():
+    """
+    Checks that equal sentences are one object while alive, that they
+    are freed with their last user, and that a hash collision in
+    Sentence.interned still shares them.
+    """
+    p, q = Symbol("shared_p"), Symbol("shared_q")
+    if (And(p, Not(q)) is not And(p, Not(q))
+            or pickle.loads(pickle.dumps(Not(q))) is not Not(q)):
+        sys.exit("interning: equal sentences are different objects")
+
+    gc.collect()
+    entries = len(Sentence.interned)
+    knowledge = [And(*[Implication(Symbol(f"x{i}_{j}"), Or(p, Symbol(f"y{i}")))
+                       for j in range(50)])
+                 for i in range(200)]
+    del knowledge
+    gc.collect()
+    if len(Sentence.interned) != entries:
+        sys.exit(f"interning: {len(Sentence.interned) - entries} sentences kept alive")
+
+    # Point the entry of Not(q) at another live sentence, as a hash
+    # collision would
+    other = Or(p, q)
+    key = hash((Not, (q,)))
+    Sentence.interned[key] = Sentence.interned[hash((Or, (p, q)))]
+    first, second = Not(q), Not(q)
+    del Sentence.interned[key]
+    if first is not second or Not(q) is not first or first.operand is not q:
+        sys.exit("interning: colliding sentences are not shared")
+    del first, second, other
+    gc.collect()
+    if len(Sentence.interned) != entries:
+        sys.exit("interning: colliding sentences kept alive")
+    print("interning shares and frees sentences")
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python check.py [trials]")
+    trials = int(sys.argv[1]) if len(sys.argv) == 2 else 300
+    check_engines(trials)
+    check_incremental(trials // 2)
+    check_deep_nesting()
+    check_interning()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,81 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bit patterns of the first 6 symbols across the 64 models in a word
+WORD_PATTERNS = (
+    0xAAAAAAAAAAAAAAAA, 0xCCCCCCCCCCCCCCCC, 0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00, 0xFFFF0000FFFF0000, 0xFFFFFFFF00000000
+)
+ALL_MODELS = 0xFFFFFFFFFFFFFFFF
+
+# (knowledge, query, symbols, shard size, stop event) in a parallel_check
+# pool worker, set by init_shard_worker
+shard_state = None
 
 
 class Sentence():
+    """
+    Sentences are hash-consed: building a sentence structurally equal
+    to a live one returns that same object, so equal subformulas are
+    shared and equality is identity. Sentences are immutable, which
+    lets the symbol set, formula and compiled evaluators be computed
+    at most once.
+    """
+
+    __slots__ = ("_symbols", "_formula", "_compiled", "__weakref__")
+
+    # Weak references to live sentences by the hash of (class, children);
+    # children are interned, so that hash is over their ids. An entry
+    # goes away with its sentence, so only sentences in use are shared.
+    # The rare sentence whose hash is taken by another live one is keyed
+    # by (class, children) instead, and counted in collisions
+    interned = {}
+    collisions = 0
+
+    @classmethod
+    def intern(cls, arguments, *values):
+        """
+        Returns the live sentence of class cls built from `arguments`,
+        creating it with its own slots set to `values` if there is none.
+        """
+        key = hash((cls, arguments))
+        ref = Sentence.interned.get(key)
+        live = ref and ref()
+        if type(live) is cls and live.__getnewargs__() == arguments:
+            return live
+        if Sentence.collisions:
+            ref = Sentence.interned.get((cls, arguments))
+            sentence = ref and ref()
+            if sentence is not None:
+                return sentence
+        sentence = object.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            object.__setattr__(sentence, name, value)
+        if live is not None:
+            key = (cls, arguments)
+            Sentence.collisions += 1
+        ref = _Entry(sentence, _forget)
+        ref.key = key
+        Sentence.interned[key] = ref
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __reduce__(self):
+        # Unpickling and copying go through the constructor, so they
+        # return the interned sentence too
+        return (type(self), self.__getnewargs__())
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -9,11 +83,67 @@ class Sentence():
 
     def formula(self):
         """Returns string formula representing logical sentence."""
-        return ""
+        try:
+            return self._formula
+        except AttributeError:
+            object.__setattr__(self, "_formula", self.write_formula())
+            return self._formula
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        try:
+            return self._symbols
+        except AttributeError:
+            object.__setattr__(self, "_symbols", self.find_symbols())
+            return self._symbols
+
+    def write_formula(self):
+        return ""
+
+    def find_symbols(self):
+        return frozenset()
+
+    def expression(self, positions):
+        """
+        Returns Python source evaluating the sentence over an int `m`,
+        where symbol name n is true when bit positions[n] of m is set.
+        """
+        raise Exception("nothing to compile")
+
+    def evaluate_words(self, columns):
+        """
+        Evaluates the sentence over packed truth tables: columns maps
+        each symbol name to a uint64 array holding 64 models per word.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Returns a function of an int bitmask that evaluates the sentence,
+        with bit k of the mask giving the truth of symbols[k].
+        The function is generated once per symbol order and cached.
+
+        Sentences nested too deeply for the parser are evaluated
+        through a model dict per call instead, like check_all does.
+        """
+        symbols = tuple(symbols)
+        try:
+            compiled = self._compiled
+        except AttributeError:
+            compiled = {}
+            object.__setattr__(self, "_compiled", compiled)
+        if symbols not in compiled:
+            positions = {name: k for k, name in enumerate(symbols)}
+            try:
+                source = f"lambda m: bool({self.expression(positions)})"
+                function = eval(source)
+            except (MemoryError, RecursionError, SyntaxError):
+                def function(m):
+                    return self.evaluate({
+                        name: m >> k & 1 for k, name in enumerate(symbols)
+                    })
+            compiled[symbols] = function
+        return compiled[symbols]
 
     @classmethod
     def validate(cls, sentence):
@@ -42,16 +172,28 @@ class Sentence():
             return f"({s})"
 
 
-class Symbol(Sentence):
+class _Entry(weakref.ref):
+    """
+    A weak reference to an interned sentence that knows its key in
+    Sentence.interned. Unlike weakref.KeyedRef it is built in C.
+    """
+
+    __slots__ = ("key",)
 
-    def __init__(self, name):
-        self.name = name
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+def _forget(ref):
+    if Sentence.interned.get(ref.key) is ref:
+        del Sentence.interned[ref.key]
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+
+class Symbol(Sentence):
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        return cls.intern((name,), name)
+
+    def __getnewargs__(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,23 +204,34 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
-    def formula(self):
+    def write_formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def evaluate_words(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def expression(self, positions):
+        try:
+            return f"(m >> {positions[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def find_symbols(self):
+        return frozenset((self.name,))
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,), operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __getnewargs__(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +239,29 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
+    def write_formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
+    def evaluate_words(self, columns):
+        return ~self.operand.evaluate_words(columns)
+
+    def expression(self, positions):
+        return f"(not {self.operand.expression(positions)})"
+
+    def find_symbols(self):
         return self.operand.symbols()
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        return cls.intern(conjuncts, conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __getnewargs__(self):
+        return self.conjuncts
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +270,47 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError(
+            "sentences are immutable; build And(*kb.conjuncts, conjunct) "
+            "or add facts to a sat.IncrementalKB instead"
+        )
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def write_formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def find_symbols(self):
+        return frozenset().union(*[conjunct.symbols() for conjunct in self.conjuncts])
+
+    def evaluate_words(self, columns):
+        words = np.uint64(ALL_MODELS)
+        for conjunct in self.conjuncts:
+            words = words & conjunct.evaluate_words(columns)
+        return words
+
+    def expression(self, positions):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.expression(positions) for conjunct in self.conjuncts
+        ) + ")"
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return cls.intern(disjuncts, disjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __getnewargs__(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +319,39 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def write_formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def find_symbols(self):
+        return frozenset().union(*[disjunct.symbols() for disjunct in self.disjuncts])
+
+    def evaluate_words(self, columns):
+        words = np.uint64(0)
+        for disjunct in self.disjuncts:
+            words = words | disjunct.evaluate_words(columns)
+        return words
+
+    def expression(self, positions):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.expression(positions) for disjunct in self.disjuncts
+        ) + ")"
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return cls.intern((antecedent, consequent), antecedent, consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __getnewargs__(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +360,34 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
+    def write_formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def find_symbols(self):
+        return self.antecedent.symbols() | self.consequent.symbols()
+
+    def evaluate_words(self, columns):
+        return (~self.antecedent.evaluate_words(columns)
+                | self.consequent.evaluate_words(columns))
+
+    def expression(self, positions):
+        antecedent = self.antecedent.expression(positions)
+        consequent = self.consequent.expression(positions)
+        return f"(not {antecedent} or {consequent})"
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return cls.intern((left, right), left, right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __getnewargs__(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +398,50 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
+    def write_formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def find_symbols(self):
+        return self.left.symbols() | self.right.symbols()
+
+    def evaluate_words(self, columns):
+        return ~(self.left.evaluate_words(columns)
+                 ^ self.right.evaluate_words(columns))
+
+    def expression(self, positions):
+        left = self.left.expression(positions)
+        right = self.right.expression(positions)
+        return f"((not {left}) == (not {right}))"
+
+
+def model_check(knowledge, query, engine="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    `engine` is "enumerate" to check every model of the symbols with
+    compiled sentences, "recursive" to build and evaluate each model
+    as a dict, or "dpll" to compile both sentences to CNF and let the
+    DPLL solver in sat.py show that knowledge ∧ ¬query is unsatisfiable,
+    or "vectorized" to evaluate whole truth tables at once with NumPy,
+    or "parallel" to split the models across processes.
+    """
+    if engine == "vectorized":
+        return vectorized_check(knowledge, query)
+    elif engine == "parallel":
+        return parallel_check(knowledge, query)
+    elif engine == "dpll":
+        import sat
+        return sat.entails(knowledge, query)
+    elif engine == "enumerate":
+        symbols = sorted(knowledge.symbols() | query.symbols())
+        holds = knowledge.compile(symbols)
+        follows = query.compile(symbols)
+        return not any(holds(m) and not follows(m)
+                       for m in range(1 << len(symbols)))
+    elif engine != "recursive":
+        raise ValueError(f"unknown model checking engine {engine!r}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +472,151 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_many(knowledge, queries, engine="enumerate"):
+    """
+    Checks which of several queries the knowledge base entails,
+    returning a list of booleans in the order of `queries`.
+
+    With the "enumerate" engine every model of the knowledge base is
+    visited once for all queries; a query is dropped at its first
+    counter-model and the search stops once every query is refuted.
+    The "dpll" engine asks the solver in sat.py for counter-models
+    instead, reusing one CNF encoding for every query.
+    """
+    queries = list(queries)
+    if engine == "dpll":
+        import sat
+        return sat.entails_many(knowledge, queries)
+    elif engine != "enumerate":
+        raise ValueError(f"unknown model checking engine {engine!r}")
+
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    holds = knowledge.compile(symbols)
+    follows = [query.compile(symbols) for query in queries]
+    entailed = [True] * len(queries)
+
+    # Indices of the queries without a counter-model yet
+    pending = list(range(len(queries)))
+    for m in range(1 << len(symbols)):
+        if not pending:
+            break
+        if holds(m):
+            for k in pending:
+                if not follows[k](m):
+                    entailed[k] = False
+            pending = [k for k in pending if entailed[k]]
+    return entailed
+
+
+def vectorized_check(knowledge, query, chunk=1 << 16):
+    """
+    Checks if knowledge base entails query by evaluating both over
+    every model at once, packed 64 models per uint64 word.
+
+    Model m sits at bit m % 64 of word m // 64, so the first 6 symbols
+    have the same bit pattern in every word and the others are all
+    ones or all zeros per word. Words are processed `chunk` at a time
+    to bound memory.
+    """
+    if np is None:
+        raise ImportError("the vectorized engine needs numpy")
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    words = 1 << max(len(symbols) - 6, 0)
+    return check_words(knowledge, query, symbols, 0, words, chunk)
+
+
+def check_words(knowledge, query, symbols, first, last, chunk=1 << 16,
+                stop=None):
+    """
+    Checks the models packed in words `first` to `last` (exclusive) as
+    vectorized_check does; returns False on a counter-model. Gives up
+    and returns True between chunks once the `stop` event is set.
+    """
+    count = len(symbols)
+
+    # With fewer than 6 symbols only the low 2 ** count bits are models
+    valid = np.uint64(ALL_MODELS if count >= 6 else (1 << (1 << count)) - 1)
+
+    for start in range(first, last, chunk):
+        if stop is not None and stop.is_set():
+            return True
+        index = np.arange(start, min(last, start + chunk), dtype=np.uint64)
+        columns = {}
+        for k, name in enumerate(symbols):
+            if k < 6:
+                columns[name] = np.full(len(index), WORD_PATTERNS[k], dtype=np.uint64)
+            else:
+                bit = (index >> np.uint64(k - 6)) & np.uint64(1)
+                columns[name] = np.uint64(0) - bit
+        holds = np.broadcast_to(knowledge.evaluate_words(columns), index.shape)
+        follows = np.broadcast_to(query.evaluate_words(columns), index.shape)
+        if np.any(holds & ~follows & valid):
+            return False
+    return True
+
+
+def parallel_check(knowledge, query, split=None, workers=None):
+    """
+    Checks if knowledge base entails query across a pool of `workers`
+    processes. Fixing the last `split` symbols splits the models into
+    2 ** split shards of consecutive model numbers; each worker checks
+    whole shards, packed 64 models per word when NumPy is available
+    and with compiled sentences otherwise. The first shard to find a
+    counter-model sets a shared event that stops the others.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    workers = workers or os.cpu_count()
+    if split is None:
+        # A few shards per worker, so uneven shards still balance
+        split = (4 * workers - 1).bit_length()
+
+    # Vectorized shards must span whole words
+    smallest = 6 if np is not None else 0
+    split = max(0, min(split, len(symbols) - smallest))
+    size = 1 << (len(symbols) - split)
+
+    stop = multiprocessing.Event()
+    with multiprocessing.Pool(
+        workers, initializer=init_shard_worker,
+        initargs=(knowledge, query, symbols, size, stop)
+    ) as pool:
+        for entailed in pool.imap_unordered(check_shard, range(1 << split)):
+            if not entailed:
+                stop.set()
+                return False
+    return True
+
+
+def init_shard_worker(knowledge, query, symbols, size, stop):
+    global shard_state
+    shard_state = (knowledge, query, symbols, size, stop)
+
+
+def check_shard(shard):
+    """
+    Checks models shard * size to (shard + 1) * size in a pool worker;
+    returns False on a counter-model.
+    """
+    knowledge, query, symbols, size, stop = shard_state
+    first, last = shard * size, (shard + 1) * size
+    if np is not None:
+        return check_words(knowledge, query, symbols,
+                           first >> 6, max(last >> 6, 1), stop=stop)
+
+    holds = knowledge.compile(symbols)
+    follows = query.compile(symbols)
+    for start in range(first, last, 1 << 12):
+        if stop.is_set():
+            return True
+        if any(holds(m) and not follows(m)
+               for m in range(start, min(last, start + (1 << 12)))):
+            return False
+    return True
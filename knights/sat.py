@@ -0,0 +1,347 @@
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Encoder():
+    """
+    Compiles logical sentences to CNF clauses over integer literals:
+    variable v is the literal v, its negation -v.
+
+    Compound subformulas get a fresh variable defined by Tseitin
+    clauses, so the CNF grows linearly with the sentence; structurally
+    equal subformulas share one variable.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.variables = {}
+        self.definitions = {}
+        self.count = 0
+
+    def variable(self, name):
+        """Returns the variable of a symbol name, creating it if needed."""
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+        return self.variables[name]
+
+    def fresh(self):
+        self.count += 1
+        return self.count
+
+    def assert_sentence(self, sentence):
+        """Adds clauses that hold exactly when the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_sentence(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(d) for d in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            g = self.fresh()
+            for p in parts:
+                self.clauses.append([-g, p])
+            self.clauses.append([g] + [-p for p in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            g = self.fresh()
+            for p in parts:
+                self.clauses.append([g, -p])
+            self.clauses.append([-g] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            g = self.fresh()
+            self.clauses += [[-g, -a, b], [g, a], [g, -b]]
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            g = self.fresh()
+            self.clauses += [[-g, -a, b], [-g, a, -b], [g, a, b], [g, -a, -b]]
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.definitions[sentence] = g
+        return g
+
+
+class Solver():
+    """
+    DPLL satisfiability solver with unit propagation over two watched
+    literals per clause.
+    """
+
+    def __init__(self, clauses, count):
+        self.count = count
+        self.value = [0] * (count + 1)
+        self.trail = []
+        self.head = 0
+        self.watches = {}
+        self.clauses = []
+        self.units = []
+        self.empty = False
+
+        # Length of the trail prefix forced by the clauses alone, which
+        # simplify() keeps assigned across solves
+        self.root = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+        # Branch on the most frequent variables first
+        occurrences = [0] * (count + 1)
+        for clause in self.clauses:
+            for literal in clause:
+                occurrences[abs(literal)] += 1
+        self.order = sorted(range(1, count + 1), key=lambda v: -occurrences[v])
+
+    def extend(self, count):
+        """Adds variables up to `count`, branched on after the others."""
+        self.value += [0] * (count - self.count)
+        self.order += range(self.count + 1, count + 1)
+        self.count = count
+
+    def add_clause(self, clause):
+        """
+        Adds a clause, dropping duplicates, tautologies, clauses that
+        the root assignment satisfies and literals that it falsifies.
+        """
+        self.undo(self.root)
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if self.root:
+            if any(self.literal_value(literal) == 1 for literal in clause):
+                return
+            clause = [literal for literal in clause
+                      if self.literal_value(literal) == 0]
+        if not clause:
+            self.empty = True
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            index = len(self.clauses)
+            self.clauses.append(clause)
+            self.watches.setdefault(clause[0], []).append(index)
+            self.watches.setdefault(clause[1], []).append(index)
+
+    def literal_value(self, literal):
+        v = self.value[abs(literal)]
+        return v if literal > 0 else -v
+
+    def assign(self, literal):
+        self.value[abs(literal)] = 1 if literal > 0 else -1
+        self.trail.append(literal)
+
+    def undo(self, length):
+        """Unassigns everything past the first `length` trail entries."""
+        for literal in self.trail[length:]:
+            self.value[abs(literal)] = 0
+        del self.trail[length:]
+        self.head = min(self.head, length)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses; returns False on
+        a conflict.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                other = clause[0]
+                if self.literal_value(other) == 1:
+                    kept.append(index)
+                    continue
+
+                # Look for another literal to watch instead
+                for k in range(2, len(clause)):
+                    if self.literal_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.literal_value(other) == -1:
+                        kept.extend(watching[position + 1:])
+                        self.watches[false] = kept
+                        return False
+                    self.assign(other)
+            self.watches[false] = kept
+        return True
+
+    def simplify(self):
+        """
+        Assigns the unit clauses and everything they force for good,
+        so that later solves start from there instead of redoing it.
+        """
+        self.undo(self.root)
+        for literal in self.units:
+            state = self.literal_value(literal)
+            if state == -1:
+                self.empty = True
+            elif state == 0:
+                self.assign(literal)
+        self.units = []
+        if not self.empty and not self.propagate():
+            self.empty = True
+        self.root = len(self.trail)
+
+    def solve(self, assumptions=()):
+        """
+        Returns True and fills self.model if the clauses are satisfiable
+        together with the assumption literals, False otherwise.
+        """
+        self.undo(self.root)
+        self.model = None
+        if self.empty:
+            return False
+        for literal in list(self.units) + list(assumptions):
+            state = self.literal_value(literal)
+            if state == -1:
+                return False
+            if state == 0:
+                self.assign(literal)
+        if not self.propagate():
+            return False
+
+        # Decision stack of (trail length before it, literal, flipped)
+        decisions = []
+        while True:
+            variable = next((v for v in self.order if not self.value[v]), None)
+            if variable is None:
+                self.model = {v: self.value[v] == 1 for v in range(1, self.count + 1)}
+                return True
+            decisions.append((len(self.trail), variable, False))
+            self.assign(variable)
+            while not self.propagate():
+                while decisions and decisions[-1][2]:
+                    decisions.pop()
+                if not decisions:
+                    self.undo(self.root)
+                    return False
+                length, literal, _ = decisions.pop()
+                self.undo(length)
+                decisions.append((length, -literal, True))
+                self.assign(-literal)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query: knowledge ∧ ¬query must be
+    unsatisfiable.
+    """
+    encoder = Encoder()
+    encoder.assert_sentence(knowledge)
+    encoder.assert_sentence(Not(query))
+    return not Solver(encoder.clauses, encoder.count).solve()
+
+
+def entails_many(knowledge, queries):
+    """
+    Checks which queries the knowledge base entails, returning a list
+    of booleans. The knowledge base is encoded and loaded into the
+    solver once; each query is then refuted by a model satisfying the
+    assumption ¬query, and that model also refutes every other open
+    query it falsifies.
+    """
+    encoder = Encoder()
+    encoder.assert_sentence(knowledge)
+    literals = [encoder.literal(query) for query in queries]
+    solver = Solver(encoder.clauses, encoder.count)
+    entailed = [None] * len(queries)
+    for k, literal in enumerate(literals):
+        if entailed[k] is not None:
+            continue
+        if not solver.solve([-literal]):
+            entailed[k] = True
+            continue
+        model = solver.model
+        for j in range(k, len(literals)):
+            if entailed[j] is None and model[abs(literals[j])] != (literals[j] > 0):
+                entailed[j] = False
+    return entailed
+
+
+class IncrementalKB():
+    """
+    A knowledge base that takes facts one at a time and answers
+    entailment queries between them without starting over.
+
+    Clauses stay loaded in one solver, and whatever the facts force on
+    their own stays assigned at its root, so a new fact only propagates
+    its own consequences. Facts are never retracted, so answers are
+    monotonic: an entailed query stays entailed and is kept as a unit
+    clause that strengthens propagation, and a refuted query keeps
+    its counter-model, as a truth value per symbol, until a new fact
+    is false in it.
+    """
+
+    def __init__(self, *facts):
+        self.encoder = Encoder()
+        self.solver = Solver([], 0)
+
+        # Number of encoder clauses already given to the solver
+        self.loaded = 0
+
+        self.entailed = set()
+        self.counter_models = {}
+        for fact in facts:
+            self.add(fact)
+
+    def load(self):
+        """Gives the solver the clauses encoded since the last call."""
+        self.solver.extend(self.encoder.count)
+        for clause in self.encoder.clauses[self.loaded:]:
+            self.solver.add_clause(clause)
+        self.loaded = len(self.encoder.clauses)
+        self.solver.simplify()
+
+    def add(self, fact):
+        """Adds a fact to the knowledge base."""
+        self.encoder.assert_sentence(fact)
+        self.load()
+
+        # A counter-model survives if it already satisfies the new fact
+        symbols = fact.symbols()
+        for query, model in list(self.counter_models.items()):
+            if not symbols <= model.keys() or not fact.evaluate(model):
+                del self.counter_models[query]
+
+    def entails(self, query):
+        """Checks if the facts added so far entail query."""
+        if query in self.entailed:
+            return True
+        if query in self.counter_models:
+            return False
+        literal = self.encoder.literal(query)
+        self.load()
+        if self.solver.solve([-literal]):
+            model = self.solver.model
+            self.counter_models[query] = {
+                name: model[variable]
+                for name, variable in self.encoder.variables.items()
+            }
+            return False
+        self.entailed.add(query)
+        self.solver.add_clause([literal])
+        self.solver.simplify()
+        return True
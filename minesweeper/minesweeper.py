@@ -1,6 +1,5 @@
 import itertools
 import random
-import copy as cp
 
 
 class Minesweeper():
@@ -90,53 +89,56 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Sentences are immutable and hashable, so a knowledge base can hold
+    them in a set and reject duplicates in constant time.
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return hash((self.cells, self.count))
+
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
 
     def known_mines(self):
-
-        if self.count == len(self.cells) :
-
-            stc=cp.deepcopy(self.cells)
-            return stc
-        
-        else:
-            return set()
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        if self.count == len(self.cells):
+            return self.cells
+        return frozenset()
 
     def known_safes(self):
-
-        if self.count == 0 :
-
-            stc=cp.deepcopy(self.cells)
-            return stc
-        
-        else:
-            return set()
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.count == 0:
+            return self.cells
+        return frozenset()
 
     def mark_mine(self, cell):
-
+        """
+        Returns the sentence left once `cell` is known to be a mine.
+        """
         if cell in self.cells:
-
-            self.cells.remove(cell)  
-            self.count-=1    
-            cell = Sentence(cell,1)
-        
+            return Sentence(self.cells - {cell}, self.count - 1)
+        return self
 
     def mark_safe(self, cell):
-        
+        """
+        Returns the sentence left once `cell` is known to be safe.
+        """
         if cell in self.cells:
+            return Sentence(self.cells - {cell}, self.count)
+        return self
 
-            self.cells.remove(cell)     
-            cell = Sentence(cell,0)
 
 class MinesweeperAI():
     """
@@ -156,83 +158,69 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells not clicked on yet
+        self.safe_moves = set()
+
+        # Set of sentences about the game known to be true, and the
+        # sentences that mention each cell
+        self.knowledge = set()
+        self.index = {}
+
+        # Sentences added or changed since inference last looked at them
+        self.pending = []
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        for sentence in list(self.index.get(cell, ())):
+            self.remove_sentence(sentence)
+            self.add_sentence(sentence.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in list(self.index.get(cell, ())):
+            self.remove_sentence(sentence)
+            self.add_sentence(sentence.mark_safe(cell))
 
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base without the cells already
+        known to be mines or safe, unless it says nothing new.
+        """
+        mines = sentence.cells & self.mines
+        safes = sentence.cells & self.safes
+        if mines or safes:
+            sentence = Sentence(sentence.cells - mines - safes,
+                                sentence.count - len(mines))
+        if not sentence.cells or sentence in self.knowledge:
+            return
+        self.knowledge.add(sentence)
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(sentence)
+        self.pending.append(sentence)
+
+    def remove_sentence(self, sentence):
+        self.knowledge.discard(sentence)
+        for cell in sentence.cells:
+            containing = self.index[cell]
+            containing.discard(sentence)
+            if not containing:
+                del self.index[cell]
 
     def add_knowledge(self, cell, count):
-
-        self.moves_made.add(cell)   #1
-
-        self.mark_safe(cell)        #2
-
-        st = set()
-
-        for i in range(cell[0] - 1, cell[0] + 2):           #3
-            for j in range(cell[1] - 1, cell[1] + 2):
-                 
-                 if (i, j) == cell:
-
-                    continue
-                 
-                 if 0<=i<self.height and 0<=j<self.width and not (i,j) in self.safes and not (i,j) in self.mines :
-
-                    st.add((i,j))
-        
-        if len(st)>0 : self.knowledge.append(Sentence(st,count))    
-            
-        for sentence in self.knowledge :     #4
-
-            if len(sentence.known_safes()) > 0 :
-
-                for cls in sentence.known_safes() : #RuntimeError: Set changed size during iteration à régler
-                    self.mark_safe(cls)
-
-
-            if len(sentence.known_mines()) > 0 :
-
-                for cls in sentence.known_mines() :
-                    self.mark_mine(cls)
-
-
-        for i in range(len(self.knowledge)) :  #5
-            for j in range(len(self.knowledge)) :
-
-                if self.knowledge[i] == self.knowledge[j] :
-
-                    continue 
-
-                if self.knowledge[i].cells.issubset(self.knowledge[j].cells) :
-
-                    stbis=Sentence(set([elt for elt in self.knowledge[j].cells if not elt in self.knowledge[i].cells]),self.knowledge[j].count-self.knowledge[i].count)
-                    
-                    if not stbis in self.knowledge :
-
-                        self.knowledge.append(stbis)
-                    
-        
-        #5 parcour knowledge et cherche si y a pas des cells presentes dans deux meme phrases et en déduit une autre
-
-
         """
         Called when the Minesweeper board tells us, for a given
         safe cell, how many neighboring cells have mines in them.
@@ -246,17 +234,54 @@ class MinesweeperAI():
                if it can be concluded based on the AI's knowledge base
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
-        """ 
-        
-        
+        """
+        self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
+        self.mark_safe(cell)
 
-    def make_safe_move(self):
+        neighbors = set()
+        for i in range(cell[0] - 1, cell[0] + 2):
+            for j in range(cell[1] - 1, cell[1] + 2):
+                if (i, j) != cell and 0 <= i < self.height and 0 <= j < self.width:
+                    neighbors.add((i, j))
+        self.add_sentence(Sentence(neighbors, count))
+        self.infer()
 
-        for elt in self.safes:
-            if not elt in self.moves_made:
-                return elt
-        return None
+    def infer(self):
+        """
+        Draws conclusions from the sentences added or changed since the
+        last call, comparing each only with the sentences that share a
+        cell with it; new conclusions are worked through in turn.
+        """
+        while self.pending:
+            sentence = self.pending.pop()
+            if sentence not in self.knowledge:
+                continue
+
+            if sentence.known_mines():
+                for cell in sentence.known_mines():
+                    self.mark_mine(cell)
+                continue
+            if sentence.known_safes():
+                for cell in sentence.known_safes():
+                    self.mark_safe(cell)
+                continue
+
+            # A sentence that is a subset or superset of this one
+            # shares a cell with it
+            related = set()
+            for cell in sentence.cells:
+                related |= self.index[cell]
+            related.discard(sentence)
+            for other in related:
+                if other.cells < sentence.cells:
+                    self.add_sentence(Sentence(sentence.cells - other.cells,
+                                               sentence.count - other.count))
+                elif sentence.cells < other.cells:
+                    self.add_sentence(Sentence(other.cells - sentence.cells,
+                                               other.count - sentence.count))
 
+    def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
         The move must be known to be safe, and not already a move
@@ -265,21 +290,20 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-
+        for cell in self.safe_moves:
+            if cell not in self.moves_made:
+                return cell
+        return None
 
     def make_random_move(self):
-        
-        for i in range(self.height):
-            for j in range(self.width):
-                if not (i,j) in self.mines and not (i,j) in self.moves_made:
-                    return (i,j)
-        return None
         """
         Returns a move to make on the Minesweeper board.
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
         """
-
-
-
+        for i in range(self.height):
+            for j in range(self.width):
+                if not (i, j) in self.mines and not (i, j) in self.moves_made:
+                    return (i, j)
+        return None
@@ -0,0 +1,60 @@
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def positions(count, seed=0):
+    """
+    Returns reproducible random non-terminal boards after 1 to 6 moves.
+    """
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = ttt.initial_state()
+        for _ in range(rng.randint(1, 6)):
+            board = ttt.result(board, rng.choice(ttt.actions(board)))
+            if ttt.terminal(board):
+                break
+        if not ttt.terminal(board):
+            boards.append(board)
+    return boards
+
+
+def compare(boards):
+    """
+    Runs each search over the same boards and prints total wall time
+    and positions visited; fails if any chosen move differs.
+    """
+    searches = [
+        ("minimax", 0, False),
+        ("minimax+table", ttt.TABLE_SIZE, False),
+        ("alphabeta", 0, True)
+    ]
+    moves = []
+    for name, size, pruning in searches:
+        ttt.TABLE_SIZE = size
+        ttt.cache_clear()
+        nodes = 0
+        chosen = []
+        start = time.perf_counter()
+        for board in boards:
+            chosen.append(ttt.minimax(board, pruning=pruning))
+            nodes += ttt.search_stats["nodes"]
+        elapsed = time.perf_counter() - start
+        moves.append(chosen)
+        print(f"{name:>14}: {elapsed:8.3f}s  {nodes:>10} positions")
+
+    if any(chosen != moves[0] for chosen in moves):
+        sys.exit("Searches chose different moves")
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [positions]")
+    compare(positions(int(sys.argv[1]) if len(sys.argv) == 2 else 20))
+
+
+if __name__ == "__main__":
+    main()
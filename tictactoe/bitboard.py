@@ -0,0 +1,178 @@
+"""
+Tic Tac Toe Player over bitboards
+
+A position is a pair (x, o) of 9-bit integers; bit 3 * i + j is set
+when X (or O) holds cell (i, j).
+"""
+
+import random
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# Cell permutations for the 8 rotations and reflections of the board
+SYMMETRIES = [
+    [3 * i + j for i in range(3) for j in range(3)],
+    [3 * j + (2 - i) for i in range(3) for j in range(3)],
+    [3 * (2 - i) + (2 - j) for i in range(3) for j in range(3)],
+    [3 * (2 - j) + i for i in range(3) for j in range(3)],
+    [3 * i + (2 - j) for i in range(3) for j in range(3)],
+    [3 * (2 - i) + j for i in range(3) for j in range(3)],
+    [3 * j + i for i in range(3) for j in range(3)],
+    [3 * (2 - j) + (2 - i) for i in range(3) for j in range(3)]
+]
+
+# Image of every 9-bit mask under each symmetry
+_IMAGES = [
+    [sum(1 << permutation[bit] for bit in range(9) if mask >> bit & 1)
+     for mask in range(512)]
+    for permutation in SYMMETRIES
+]
+
+
+def initial_state():
+    """
+    Returns starting position.
+    """
+    return (0, 0)
+
+
+def canonical(position):
+    """
+    Returns the smallest `x | o << 9` key among the position's
+    8 rotations and reflections.
+    """
+    x, o = position
+    return min(image[x] | image[o] << 9 for image in _IMAGES)
+
+
+def from_board(board):
+    """
+    Converts a nested-list board to a position.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(position):
+    """
+    Converts a position to a nested-list board.
+    """
+    x, o = position
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def player(position):
+    """
+    Returns player who has the next turn on a position.
+    """
+    x, o = position
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def actions(position):
+    """
+    Returns list of all (i, j) moves available on a position.
+    """
+    return [divmod(bit, 3) for bit in moves(position)]
+
+
+def moves(position):
+    """
+    Returns the bit indices of all empty cells.
+    """
+    empty = ~(position[0] | position[1]) & FULL
+    return [bit for bit in range(9) if empty >> bit & 1]
+
+
+def result(position, action):
+    """
+    Returns the position that results from making move (i, j).
+    """
+    i, j = action
+    return play(position, 3 * i + j)
+
+
+def play(position, bit):
+    """
+    Returns the position after the player to move takes a cell.
+    """
+    x, o = position
+    mask = 1 << bit
+    if not 0 <= bit < 9 or (x | o) & mask:
+        raise IndexError("that's the wrong number")
+    if x.bit_count() == o.bit_count():
+        return (x | mask, o)
+    return (x, o | mask)
+
+
+def winner(position):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = position
+    for line in LINES:
+        if x & line == line:
+            return X
+        if o & line == line:
+            return O
+    return None
+
+
+def terminal(position):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return (position[0] | position[1]) == FULL or winner(position) is not None
+
+
+def utility(position):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    w = winner(position)
+    return 1 if w == X else -1 if w == O else 0
+
+
+def value(position):
+    """
+    Returns the minimax value of a position for X.
+    """
+    w = winner(position)
+    if w is not None:
+        return 1 if w == X else -1
+    if (position[0] | position[1]) == FULL:
+        return 0
+    values = [value(play(position, bit)) for bit in moves(position)]
+    return max(values) if player(position) == X else min(values)
+
+
+def minimax(position):
+    """
+    Returns the optimal (i, j) action for the current player.
+    """
+    if terminal(position):
+        return None
+    if position == initial_state():
+        return random.choice(actions(position))
+    choose = max if player(position) == X else min
+    best = choose(moves(position), key=lambda bit: value(play(position, bit)))
+    return divmod(best, 3)
@@ -0,0 +1,101 @@
+"""
+Perfect-play opening book for Tic Tac Toe
+
+The book holds one byte per base-3 board encoding (3^9 = 19683 bytes):
+the best move's bit index in the low 4 bits and the minimax value + 1
+above them, or EMPTY_ENTRY for positions that are terminal or cannot
+occur in play.
+"""
+
+import sys
+
+import bitboard
+
+MAGIC = b"TTTBOOK1"
+SIZE = 3 ** 9
+EMPTY_ENTRY = 0xFF
+PATH = "book.bin"
+
+
+def index(position):
+    """
+    Returns the base-3 encoding of a position: cell 3 * i + j counts
+    3 ** (3 * i + j) times 0, 1 or 2 for empty, X or O.
+    """
+    x, o = position
+    code = 0
+    for bit in range(8, -1, -1):
+        code = code * 3 + (1 if x >> bit & 1 else 2 if o >> bit & 1 else 0)
+    return code
+
+
+def solve():
+    """
+    Solves every position reachable from the empty board and returns
+    the book's bytes.
+    """
+    table = bytearray([EMPTY_ENTRY]) * SIZE
+    values = {}
+
+    def search(position):
+        if position in values:
+            return values[position]
+        if bitboard.terminal(position):
+            values[position] = bitboard.utility(position)
+            return values[position]
+
+        # Same tie-break as minimax: the first best move in cell order
+        choose_x = bitboard.player(position) == bitboard.X
+        best_move, best_value = None, None
+        for bit in bitboard.moves(position):
+            v = search(bitboard.play(position, bit))
+            if best_value is None or (v > best_value if choose_x else v < best_value):
+                best_move, best_value = bit, v
+        table[index(position)] = (best_value + 1) << 4 | best_move
+        values[position] = best_value
+        return best_value
+
+    search(bitboard.initial_state())
+    return bytes(table)
+
+
+def save(table, path=PATH):
+    with open(path, "wb") as f:
+        f.write(MAGIC + table)
+
+
+def load(path=PATH):
+    """
+    Returns the book's bytes, or None if the file is missing or invalid.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(MAGIC)] != MAGIC or len(data) != len(MAGIC) + SIZE:
+        return None
+    return data[len(MAGIC):]
+
+
+def lookup(table, position):
+    """
+    Returns the book's ((i, j) move, value) for a position, or None.
+    """
+    entry = table[index(position)]
+    if entry == EMPTY_ENTRY:
+        return None
+    return divmod(entry & 0xF, 3), (entry >> 4) - 1
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else PATH
+    table = solve()
+    save(table, path)
+    print(f"Solved {sum(entry != EMPTY_ENTRY for entry in table)} positions into {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Correctness checks for the Tic Tac Toe engines
+
+Compares every engine's answer on each reachable position against a
+plain minimax over bitboards, and checks that the m,n,k player always
+takes an immediate win. Exits with a message on the first failure.
+"""
+
+import random
+import sys
+
+import bitboard
+import book as opening_book
+import mnk
+import tictactoe as ttt
+
+
+def reachable():
+    """
+    Returns every board reachable from the empty board, each once.
+    """
+    seen = set()
+    boards = []
+
+    def visit(board):
+        key = str(board)
+        if key in seen:
+            return
+        seen.add(key)
+        boards.append(board)
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                visit(ttt.result(board, action))
+
+    visit(ttt.initial_state())
+    return boards
+
+
+def check_engines():
+    """
+    Checks minimax with and without pruning, with the opening book,
+    evaluate and the 3,3,3 Game against bitboard's minimax.
+    """
+    boards = [board for board in reachable()
+              if not ttt.terminal(board) and board != ttt.initial_state()]
+    game = mnk.Game(3, 3, 3)
+    table = opening_book.solve()
+    for board in boards:
+        position = bitboard.from_board(board)
+        expected = bitboard.minimax(position)
+        value = bitboard.value(position)
+
+        ttt.book = None
+        answers = {
+            "minimax": ttt.minimax(board),
+            "alphabeta": ttt.minimax(board, pruning=True),
+            "evaluate": ttt.evaluate(board)[1]
+        }
+        if ttt.evaluate(board)[0] != value:
+            sys.exit(f"evaluate: wrong value on {board}")
+        ttt.book = table
+        answers["book"] = ttt.minimax(board)
+        for engine, action in answers.items():
+            if action != expected:
+                sys.exit(f"{engine}: played {action} instead of {expected} on {board}")
+
+        move = game.minimax(board, time_limit=5)
+        if bitboard.value(bitboard.result(position, move)) != value:
+            sys.exit(f"mnk: {move} loses value on {board}")
+
+    # Boards that cannot occur in play are not in the book
+    unreachable = [["X", "X", None], [None] * 3, [None] * 3]
+    if ttt.minimax(unreachable) != (0, 2):
+        sys.exit("book: no search fallback for a board missing from it")
+    ttt.book = None
+    print(f"engines agree on {len(boards)} positions")
+
+
+def check_immediate_wins(trials, seed=0):
+    """
+    Builds random m,n,k positions where the player to move can win at
+    once, and checks that Game.minimax takes such a win.
+    """
+    rng = random.Random(seed)
+    shapes = [(3, 3, 3), (4, 4, 3), (6, 7, 4), (9, 9, 5), (15, 15, 5), (19, 19, 6)]
+    for trial in range(trials):
+        m, n, k = rng.choice(shapes)
+        game = mnk.Game(m, n, k)
+        board = random_win_in_one(game, rng)
+        player = game.player(board)
+        move = game.minimax(board, time_limit=5)
+        if game.winner(game.result(board, move)) != player:
+            sys.exit(f"mnk: {player} missed a win on {m}x{n}, k={k}: {board}")
+
+    # Open fives on 19x19, k=6: the heuristic of the position is worth
+    # more than a million, which must still lose to a win
+    game = mnk.Game(19, 19, 6)
+    board = game.initial_state()
+    for i in (2, 5, 8, 11, 14):
+        for j in range(7, 12):
+            board[i][j] = mnk.X
+    for i, step in ((0, 2), (18, 2), (16, 4)):
+        for j in range(0, 19, step):
+            board[i][j] = mnk.O
+    move = game.minimax(board, time_limit=5)
+    if game.winner(game.result(board, move)) != mnk.X:
+        sys.exit(f"mnk: X played {move} instead of completing an open five")
+    print(f"immediate wins taken in {trials + 1} positions")
+
+
+def random_win_in_one(game, rng):
+    """
+    Returns a board without a winner where the player to move has k - 1
+    stones in some window whose last cell is empty.
+    """
+    while True:
+        board = game.initial_state()
+        player = rng.choice((mnk.X, mnk.O))
+        opponent = mnk.O if player == mnk.X else mnk.X
+        window = rng.choice(game.windows)
+        gap = rng.choice(window)
+        for cell in window:
+            if cell != gap:
+                board[cell // game.n][cell % game.n] = player
+
+        # Balance the stone counts so that `player` moves next, plus a
+        # few random pairs of stones elsewhere
+        others = [cell for cell in range(game.m * game.n) if cell not in window]
+        rng.shuffle(others)
+        count = game.k - 1 if player == mnk.X else game.k
+        extra = 2 * rng.randrange(len(others) // 4 + 1)
+        stones = [opponent] * count + [player, opponent] * (extra // 2)
+        if len(stones) > len(others):
+            continue
+        for cell, stone in zip(others, stones):
+            board[cell // game.n][cell % game.n] = stone
+        if game.winner(board) is None and game.player(board) == player:
+            return board
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python check.py [trials]")
+    check_engines()
+    check_immediate_wins(int(sys.argv[1]) if len(sys.argv) == 2 else 200)
+
+
+if __name__ == "__main__":
+    main()
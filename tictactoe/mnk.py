@@ -0,0 +1,256 @@
+"""
+m,n,k-game Player
+
+Tic Tac Toe generalized to an m-row, n-column board won by k in a row,
+searched with time-bounded iterative-deepening alpha-beta.
+"""
+
+import math
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Boards up to this many cells consider every empty cell as a move;
+# bigger boards only consider cells next to a stone
+FULL_WIDTH = 25
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+    """
+    An m,n,k-game: the nested-list board of tictactoe.py, but with
+    `m` rows, `n` columns and `k` stones in a row to win.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if k > max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+
+        # Every k-cell row, column and diagonal segment, as flat indices
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(tuple(
+                            (i + di * s) * n + (j + dj * s) for s in range(k)
+                        ))
+
+        # Flat indices within one step of each cell
+        self.around = [
+            [a * n + b
+             for a in range(max(0, i - 1), min(m, i + 2))
+             for b in range(max(0, j - 1), min(n, j + 2))
+             if (a, b) != (i, j)]
+            for i in range(m) for j in range(n)
+        ]
+
+        # Score of a won position, minus the plies it took to get there;
+        # every window scores under 10 ** k in evaluate, so any win
+        # outscores the heuristic even after m * n plies
+        self.win = 10 ** k * len(self.windows) + m * n + 1
+
+        # Cells nearest the center first, for move ordering
+        center_i, center_j = (m - 1) / 2, (n - 1) / 2
+        self.by_center = sorted(
+            range(m * n),
+            key=lambda cell: abs(cell // n - center_i) + abs(cell % n - center_j)
+        )
+
+        self.nodes = 0
+        self.deadline = math.inf
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x = sum(row.count(X) for row in board)
+        o = sum(row.count(O) for row in board)
+        return X if x == o else O
+
+    def actions(self, board):
+        """
+        Returns list of all (i, j) moves available on the board.
+        """
+        return [(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY]
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j).
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise IndexError("that's the wrong number")
+        following = [row.copy() for row in board]
+        following[i][j] = self.player(board)
+        return following
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = self.flatten(board)
+        for window in self.windows:
+            first = cells[window[0]]
+            if first != EMPTY and all(cells[cell] == first for cell in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        w = self.winner(board)
+        return 1 if w == X else -1 if w == O else 0
+
+    def flatten(self, board):
+        return [cell for row in board for cell in row]
+
+    def wins_through(self, cells, move):
+        """
+        Checks whether the stone on `move` completes k in a row,
+        looking only along the four lines through it.
+        """
+        n, k = self.n, self.k
+        stone = cells[move]
+        i, j = divmod(move, n)
+        for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            for sign in (1, -1):
+                a, b = i + sign * di, j + sign * dj
+                while 0 <= a < self.m and 0 <= b < n and cells[a * n + b] == stone:
+                    count += 1
+                    a, b = a + sign * di, b + sign * dj
+            if count >= k:
+                return True
+        return False
+
+    def evaluate(self, cells):
+        """
+        Heuristic value of a position for X: every window still open to
+        one player scores 10 ** (that player's stones in it).
+        """
+        score = 0
+        for window in self.windows:
+            x = o = 0
+            for cell in window:
+                stone = cells[cell]
+                if stone == X:
+                    x += 1
+                elif stone == O:
+                    o += 1
+            if x and not o:
+                score += 10 ** x
+            elif o and not x:
+                score -= 10 ** o
+        return score
+
+    def candidates(self, cells, first=None):
+        """
+        Returns the moves to search, best guess first.
+        """
+        if self.m * self.n <= FULL_WIDTH:
+            moves = [cell for cell in self.by_center if cells[cell] == EMPTY]
+        else:
+            moves = [cell for cell in self.by_center
+                     if cells[cell] == EMPTY
+                     and any(cells[near] != EMPTY for near in self.around[cell])]
+            if not moves:
+                moves = [cell for cell in self.by_center if cells[cell] == EMPTY][:1]
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def minimax(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns the best (i, j) action for the current player found by
+        iterative-deepening alpha-beta within `time_limit` seconds.
+        """
+        cells = self.flatten(board)
+        if self.winner(board) is not None or EMPTY not in cells:
+            return None
+        color = 1 if self.player(board) == X else -1
+        empties = cells.count(EMPTY)
+        max_depth = empties if max_depth is None else min(max_depth, empties)
+
+        self.nodes = 0
+        self.deadline = time.perf_counter() + time_limit
+        best = self.candidates(cells)[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                move, value = self.search_root(cells, depth, color, best, empties)
+            except Timeout:
+                break
+            best = move
+            if abs(value) >= self.win - max_depth:
+                break
+        return divmod(best, self.n)
+
+    def search_root(self, cells, depth, color, first, empties):
+        """
+        Searches every root move to `depth`, returning the best move
+        and its value for the player to move.
+        """
+        alpha, beta = -math.inf, math.inf
+        best = None
+        stone = X if color == 1 else O
+        for move in self.candidates(cells, first):
+            cells[move] = stone
+            value = -self.negamax(cells, depth - 1, -beta, -alpha, -color,
+                                  move, 1, empties - 1)
+            cells[move] = EMPTY
+            if best is None or value > alpha:
+                alpha, best = value, move
+        return best, alpha
+
+    def negamax(self, cells, depth, alpha, beta, color, last, ply, empties):
+        """
+        Alpha-beta value of a position for the player to move (`color`
+        is 1 for X, -1 for O), where `last` is the move just played.
+        """
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        if self.wins_through(cells, last):
+            return -(self.win - ply)
+        if empties == 0:
+            return 0
+        if depth == 0:
+            return color * self.evaluate(cells)
+
+        stone = X if color == 1 else O
+        value = -math.inf
+        for move in self.candidates(cells):
+            cells[move] = stone
+            value = max(value, -self.negamax(cells, depth - 1, -beta, -alpha,
+                                             -color, move, ply + 1, empties - 1))
+            cells[move] = EMPTY
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        return value
@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -17,9 +18,38 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Answer from the precomputed book when book.py has been run
+ttt.load_book()
+
+# AI moves are searched on a background thread; `pending` maps each
+# board (as nested tuples) to the future of the AI's move on it
+worker = ThreadPoolExecutor(max_workers=1)
+pending = {}
+
+
+def key(board):
+    return tuple(tuple(row) for row in board)
+
+
+def request(board):
+    """
+    Starts searching the AI's move on a board, unless already started.
+    """
+    if key(board) not in pending:
+        pending[key(board)] = worker.submit(ttt.minimax, board)
+
+
+def forget(keep=()):
+    """
+    Drops searches for boards other than `keep`, cancelling any not yet started.
+    """
+    for board_key in list(pending):
+        if board_key not in keep:
+            pending.pop(board_key).cancel()
+
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
 
 while True:
 
@@ -108,15 +138,21 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, polling the background search each frame
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            forget(keep={key(board)})
+            request(board)
+            future = pending[key(board)]
+            if future.done():
+                board = ttt.result(board, future.result())
+                forget()
+
+        # While the user thinks, search the AI's answer to every reply
+        if user == player and not game_over:
+            for action in ttt.actions(board):
+                reply = ttt.result(board, action)
+                if not ttt.terminal(reply):
+                    request(reply)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +177,6 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    forget()
 
     pygame.display.flip()
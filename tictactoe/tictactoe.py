@@ -5,11 +5,34 @@ Tic Tac Toe Player
 import math
 import copy
 import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import book as opening_book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Canonical position -> minimax value, least recently used first
+table = OrderedDict()
+TABLE_SIZE = 4096
+table_stats = {"hits": 0, "misses": 0}
+
+# Positions visited by the last minimax search
+search_stats = {"nodes": 0}
+
+# Size and throughput of the last evaluate_many batch
+batch_stats = {"positions": 0, "seconds": 0.0, "per_second": 0.0}
+
+# Perfect-play opening book bytes, see load_book
+book = None
+
+# Alpha-beta move ordering: center, corners, then edges
+ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
 
 def initial_state():
     """
@@ -91,60 +114,239 @@ def utility(board):
     
     return 1 if winner(board) == X else 0 if not winner(board) and terminal(board) else -1
 
+def lookup(board):
+    """
+    Returns the cached minimax value of a board or any of its
+    rotations and reflections, and the cache key.
+    """
+    key = bitboard.canonical(bitboard.from_board(board))
+    if key in table:
+        table_stats["hits"] += 1
+        table.move_to_end(key)
+        return table[key], key
+    table_stats["misses"] += 1
+    return None, key
+
+
+def store(key, value):
+    """
+    Caches a minimax value, evicting the least recently used entry
+    once the table is full.
+    """
+    table[key] = value
+    if len(table) > TABLE_SIZE:
+        table.popitem(last=False)
+
+
+def cache_clear():
+    table.clear()
+    table_stats["hits"] = table_stats["misses"] = 0
+
+
 def maxValue(board):
 
+    search_stats["nodes"] += 1
+    v, key = lookup(board)
+    if v is not None:
+        return v
+
     v=-float("inf")
 
     if terminal(board):
-        return utility(board)
+        v = utility(board)
     
-    for action in actions(board):
-        v = max(v,minValue(result(board, action)))
+    else:
+        for action in actions(board):
+            v = max(v,minValue(result(board, action)))
 
+    store(key, v)
     return v
 
 def minValue(board):
 
+    search_stats["nodes"] += 1
+    v, key = lookup(board)
+    if v is not None:
+        return v
+
     v=float("inf")
 
     if terminal(board):
-        return utility(board)
+        v = utility(board)
 
-    for action in actions(board):
-        v = min(v,maxValue(result(board,action)))
+    else:
+        for action in actions(board):
+            v = min(v,maxValue(result(board,action)))
 
+    store(key, v)
     return v
 
 
-def minimax(board):
+def minimax(board, pruning=False):
     if terminal(board):
         return None
     
     elif board == initial_state():
         return random.choice(actions(board))
 
+    # Positions that cannot occur in play are not in the book
+    entry = book_entry(board)
+    if entry is not None:
+        return entry[0]
+
+    if pruning:
+        return alphabeta(board)
+
     
     else:
         p = player(board)
         acts=[]
+        search_stats["nodes"] = 0
+        moves = actions(board)
 
         if p == X : 
-            for elt in actions(board):
+            for elt in moves:
                 boardbis=result(board, elt)
                 acts.append(minValue(boardbis))
 
-            if len(acts) != len(actions(board)):
-                raise Exception ("il y a un prob sur les action")
-
-            return actions(board)[acts.index(max(acts))]
+            return moves[acts.index(max(acts))]
         
         else:
-            for elt in actions(board):
+            for elt in moves:
                 boardbis=result(board, elt)
                 acts.append(maxValue(boardbis))
 
-            if len(acts) != len(actions(board)):
-                raise Exception ("il y a un prob sur les action")
+            return moves[acts.index(min(acts))]
+
+
+def load_book(path=opening_book.PATH):
+    """
+    Loads the opening book written by book.py so that minimax answers
+    from it; returns False and keeps searching if there is none.
+    """
+    global book
+    book = opening_book.load(path)
+    return book is not None
 
-            return actions(board)[acts.index(min(acts))]
 
+def book_entry(board):
+    """
+    Returns the opening book's (action, value) for a board, or None if
+    no book is loaded or the board is not in it.
+    """
+    if book is None:
+        return None
+    return opening_book.lookup(book, bitboard.from_board(board))
+
+
+def evaluate(board):
+    """
+    Returns (value, action) for a board: its minimax value for X and
+    the move minimax would play. Once the game is over the value is
+    its utility and the action is None.
+    """
+    if terminal(board):
+        return utility(board), None
+
+    entry = book_entry(board)
+    if entry is not None:
+        action, v = entry
+        return v, action
+
+    following = minValue if player(board) == X else maxValue
+    choose = max if player(board) == X else min
+    values = [(following(result(board, action)), action) for action in actions(board)]
+    v = choose(v for v, _ in values)
+    return v, next(action for value, action in values if value == v)
+
+
+def evaluate_many(boards, workers=None, chunksize=256):
+    """
+    Returns [(value, action), ...] for an iterable of boards, sharing
+    the transposition table across the whole batch.
+
+    With `workers` > 1 the boards are split over a process pool and
+    each worker keeps its own table for all the chunks it evaluates.
+    The batch size and positions per second go to batch_stats.
+    """
+    start = time.perf_counter()
+    if workers is None or workers == 1:
+        results = [evaluate(board) for board in boards]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(book,)) as pool:
+            results = list(pool.map(evaluate, boards, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    batch_stats["positions"] = len(results)
+    batch_stats["seconds"] = elapsed
+    batch_stats["per_second"] = len(results) / elapsed if elapsed else 0.0
+    return results
+
+
+def _init_worker(table):
+    """
+    Gives a pool worker the parent's opening book, if any.
+    """
+    global book
+    book = table
+
+
+def ordered_actions(board):
+    """
+    Returns the empty cells, center first, then corners, then edges.
+    """
+    return [(i, y) for i, y in ORDER if board[i][y] == EMPTY]
+
+
+def alphabeta_value(board, alpha, beta):
+    """
+    Returns the minimax value of board if it lies strictly between
+    alpha and beta, or a bound beyond the window otherwise.
+    """
+    search_stats["nodes"] += 1
+
+    if terminal(board):
+        return utility(board)
+
+    if player(board) == X:
+        v = -1
+        for action in ordered_actions(board):
+            v = max(v, alphabeta_value(result(board, action), alpha, beta))
+            if v >= beta or v == 1:                                             # cutoff, or a win that can't be beaten
+                return v
+            alpha = max(alpha, v)
+        return v
+
+    else:
+        v = 1
+        for action in ordered_actions(board):
+            v = min(v, alphabeta_value(result(board, action), alpha, beta))
+            if v <= alpha or v == -1:
+                return v
+            beta = min(beta, v)
+        return v
+
+
+def alphabeta(board):
+    """
+    Returns the same optimal action as minimax, using alpha-beta search.
+
+    Root moves are tried in actions() order and only a strictly better
+    value replaces the best one, so ties resolve to the same move.
+    """
+    search_stats["nodes"] = 0
+    maximizing = player(board) == X
+    alpha, beta = -2, 2
+    best = None
+
+    for action in actions(board):
+        v = alphabeta_value(result(board, action), alpha, beta)
+        if maximizing and v > alpha:
+            alpha, best = v, action
+        elif not maximizing and v < beta:
+            beta, best = v, action
+        if (alpha if maximizing else beta) == (1 if maximizing else -1):
+            break
+
+    return best